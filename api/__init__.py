@@ -3,21 +3,43 @@
 Main entry point of the Task Management application.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from api.v1.tasks.routes import task_router
 from api.v1.auth.routes import auth_router
+from api.v1.metrics import metrics_router
 from api.v1.errors import register_all_errors
-from api.v1.middleware import register_middleware
+from api.v1.middleware import register_middleware, create_access_log_listener
+from api.v1.auth.cache import principal_cache
+from api.db.redis import revoked_tokens
 
 
 version = "v1"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the access log writer and the cache invalidation listeners for
+    the lifetime of the app"""
+    access_log_listener = create_access_log_listener()
+    access_log_listener.start()
+    listeners = [
+        asyncio.create_task(principal_cache.listen()),
+        asyncio.create_task(revoked_tokens.listen()),
+    ]
+    yield
+    for listener in listeners:
+        listener.cancel()
+    await asyncio.gather(*listeners, return_exceptions=True)
+    access_log_listener.stop()
+
+
 app = FastAPI(
     title="Tasks Management API",
     description="**Advanced Task Management API**",
     version=version,
+    lifespan=lifespan,
     docs_url=f"/api/{version}/docs",
     redoc_url=f"/api/{version}/redoc",
     openapi_url=f"/api/{version}/openapi.json",
@@ -33,9 +55,6 @@ app = FastAPI(
     },
 )
 
-limiter = Limiter(key_func=get_remote_address)
-app.state.limiter = limiter
-
 register_all_errors(app)
 
 register_middleware(app)
@@ -43,3 +62,4 @@ register_middleware(app)
 
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(task_router, prefix=f"/api/{version}/tasks", tags=["tasks"])
+app.include_router(metrics_router, prefix=f"/api/{version}/metrics", tags=["metrics"])
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """configuration file to read environment variables"""
 
+from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -8,9 +9,32 @@ class Settings(BaseSettings):
     """class Settings"""
 
     DATABASE_URL: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_RETRY_AFTER: float = 30
+    DB_REPLICA_LAG: float = 5
     JWT_SECRET: str
     JWT_ALGORITHM: str
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 5
+    REDIS_SOCKET_TIMEOUT: float = 5
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    TASK_CACHE_ENABLED: bool = True
+    TASK_CACHE_TTL: int = 300
+    TASK_CACHE_LOCAL_TTL: float = 5
+    TASK_CACHE_LOCAL_MAX_ENTRIES: int = 2048
+    TASK_CACHE_MAX_ITEM_BYTES: int = 262144
+    TASK_CACHE_REPLICA_LAG: float = 5
+    PRINCIPAL_CACHE_TTL: float = 60
+    BLOCKLIST_SYNC_INTERVAL: float = 300
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
@@ -21,7 +45,28 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    MAIL_SUPPRESS_SEND: bool = False
+    MAIL_POOL_SIZE: int = 4
+    MAIL_CONNECTION_MAX_MESSAGES: int = 100
+    MAIL_CONNECTION_MAX_IDLE: float = 60
+    MAIL_BATCH_SIZE: int = 100
+    MAIL_BATCH_DELAY: float = 1.0
+    MAIL_MAX_ATTEMPTS: int = 3
+    MAIL_DRAIN_INTERVAL: float = 60
+    MAIL_FANOUT_CHUNK_SIZE: int = 500
+    MAIL_FANOUT_RATE_LIMIT: str = "60/m"
     DOMAIN: str
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SLOW_MS: float = 1000
+    ACCESS_LOG_QUEUE_SIZE: int = 10000
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_AUTH: str = "1000/minute"
+    RATE_LIMIT_TASKS: str = "1000/minute"
+    RATE_LIMIT_MAGIC_LINK: str = "5/minute"
+    RATE_LIMIT_MAGIC_LINK_CONFIRM: str = "50/minute"
 
     broker_url: str = REDIS_URL
     result_backend: str = REDIS_URL
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""Per-request timing breakdown"""
+
+import asyncio
+import functools
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Optional
+from fastapi.routing import APIRoute
+
+
+class RequestTimings:
+    """Time spent and calls made per component while serving one request.
+
+    Components may overlap: `auth` includes the Redis and database calls
+    it makes, which are also counted under `redis` and `db`.
+    """
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.endpoint_done: Optional[float] = None
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add one call of `seconds` to a component"""
+        self.durations[name] += seconds
+        self.calls[name] += 1
+
+    def as_dict(self) -> dict:
+        """Milliseconds and call counts per component"""
+        timings = {}
+        for name, seconds in self.durations.items():
+            timings[f"{name}_ms"] = round(seconds * 1000, 3)
+            timings[f"{name}_calls"] = self.calls[name]
+        return timings
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timings() -> RequestTimings:
+    """Start collecting timings for the current request"""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being served, if any"""
+    return _request_timings.get()
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """Add to a component's time; a no-op outside of a request"""
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str):
+    """Time the enclosed block as one call of a component"""
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, perf_counter() - started)
+
+
+class TimedRoute(APIRoute):
+    """Route that records the time spent serializing the endpoint's result"""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _request_timings.get()
+            if timings is not None and timings.endpoint_done is not None:
+                timings.add("serialization", perf_counter() - timings.endpoint_done)
+            return response
+
+        return timed_handler
+
+
+def _mark_endpoint_done(endpoint: Callable) -> Callable:
+    """Wrap an endpoint so the time it returns is recorded"""
+
+    def mark():
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.endpoint_done = perf_counter()
+
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            mark()
+            return result
+
+    else:
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            result = endpoint(*args, **kwargs)
+            mark()
+            return result
+
+    return wrapper
@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+"""Index token blocklist keys written before the blocklist index existed
+
+    python -m api.db.backfill
+
+Run once, after every worker serves the code that writes the index.
+Until then workers check every token against Redis.
+"""
+
+import asyncio
+from api.db.redis import backfill_blocklist_index, redis_client
+
+
+async def main() -> None:
+    """Entry point of the backfill"""
+    try:
+        added = await backfill_blocklist_index()
+    finally:
+        await redis_client.aclose()
+    print(f"{added} revoked tokens added to the blocklist index")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,92 @@
 #!/usr/bin/python3
 """Database Connection Module"""
 
-from sqlmodel import SQLModel, create_engine
-from sqlalchemy.ext.asyncio import AsyncEngine
+from contextlib import asynccontextmanager
+from itertools import count
+from time import monotonic, perf_counter
+from typing import List
+from sqlmodel import SQLModel
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import sessionmaker
 from api.core.config import Config
+from api.core.timing import record_timing
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.orm import sessionmaker
 
 
-async_engine = AsyncEngine(create_engine(url=Config.DATABASE_URL, echo=False))
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = perf_counter()
+
+
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    record_timing("db", perf_counter() - context._query_started)
+
+
+def create_engine_from_config(url: str) -> AsyncEngine:
+    """Create an async engine with the pool settings from Config.
+
+    Statement execution time is added to the request's `db` timing.
+    """
+    engine = create_async_engine(
+        url,
+        echo=Config.DB_ECHO,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+        pool_pre_ping=Config.DB_POOL_PRE_PING,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", _query_started)
+    event.listen(engine.sync_engine, "after_cursor_execute", _query_finished)
+    return engine
+
+
+async_engine = create_engine_from_config(Config.DATABASE_URL)
+
+async_session_maker = sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+
+class ReplicaRouter:
+    """Round-robin over read replicas, skipping ones that recently failed"""
+
+    def __init__(self, session_makers: List[sessionmaker], retry_after: float):
+        self.session_makers = session_makers
+        self.retry_after = retry_after
+        self._failed_until = [0.0] * len(session_makers)
+        self._counter = count()
+
+    def candidates(self):
+        """Yield (index, session maker) of healthy replicas, starting round-robin"""
+        total = len(self.session_makers)
+        if not total:
+            return
+        start = next(self._counter) % total
+        now = monotonic()
+        for offset in range(total):
+            index = (start + offset) % total
+            if self._failed_until[index] <= now:
+                yield index, self.session_makers[index]
+
+    def mark_failed(self, index: int) -> None:
+        """Take a replica out of rotation for retry_after seconds"""
+        self._failed_until[index] = monotonic() + self.retry_after
+
+
+replica_engines = [
+    create_engine_from_config(url) for url in Config.DATABASE_REPLICA_URLS
+]
+
+replica_router = ReplicaRouter(
+    [
+        sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        for engine in replica_engines
+    ],
+    retry_after=Config.DB_REPLICA_RETRY_AFTER,
+)
 
 
 async def init_db() -> None:
@@ -20,9 +98,53 @@ async def init_db() -> None:
 
 async def get_session():
     """Database Dependency"""
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
+    async with async_session_maker() as session:
+        yield session
+
+
+@asynccontextmanager
+async def read_session(primary: bool = False):
+    """Open a read-only session.
 
-    async with Session() as session:
+    Routed to a replica when any are configured, falling back to the
+    primary when none can be connected to. Replicas lag behind the primary,
+    so reads that must see the caller's own writes pass `primary=True`.
+    """
+    candidates = () if primary else replica_router.candidates()
+    for index, replica_session_maker in candidates:
+        session = replica_session_maker()
+        try:
+            await session.connection()
+        except (SQLAlchemyError, OSError):
+            await session.close()
+            replica_router.mark_failed(index)
+            continue
+
+        async with session:
+            yield session
+        return
+
+    async with async_session_maker() as session:
         yield session
+
+
+async def get_read_session():
+    """Read-only Database Dependency"""
+    async with read_session() as session:
+        yield session
+
+
+def get_pool_stats(engine: AsyncEngine = async_engine) -> dict:
+    """Connection pool utilization for an engine"""
+    pool = engine.pool
+    size = pool.size()
+    checked_out = pool.checkedout()
+    capacity = size + Config.DB_MAX_OVERFLOW
+    return {
+        "size": size,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
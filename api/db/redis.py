@@ -2,21 +2,353 @@
 
 """REDIS Client"""
 
+import asyncio
+import logging
+import math
+from time import monotonic, time
+from typing import Dict, List, Optional, Tuple
 import redis.asyncio as aioredis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import RedisError
 from api.core.config import Config
+from api.core.timing import timed
 
 
-JTI_EXPIRY = 36000
+# the longest any token lives (refresh tokens last two days); used when a
+# token's own expiry is not known
+JTI_EXPIRY = 172800
 
-token_blocklist = aioredis.from_url(Config.REDIS_URL, decode_responses=True)
+BLOCKLIST_INDEX_KEY = "blocklist:jtis"
+BLOCKLIST_CHANNEL = "blocklist:revoked"
+# set once every blocklist key is also in the index, see backfill_blocklist_index
+BLOCKLIST_INDEXED_KEY = "blocklist:indexed"
+# blocklist keys are bare uuid4 jtis
+BLOCKLIST_KEY_PATTERN = "????????-????-????-????-????????????"
+USER_TOKENS_KEY = "user:{}:tokens"
+# present while a principal's reads must go to the primary, see mark_recent_write
+RECENT_WRITE_KEY = "db:recent-write:{}"
 
+# KEYS: the user's tokens, the blocklist index. ARGV: now, the blocklist
+# channel. Each unexpired jti is blocked until its token expires. Returns a
+# flat list of jti, expiry pairs.
+REVOKE_USER_TOKENS_SCRIPT = """
+local now = tonumber(ARGV[1])
+local revoked = {}
+local tokens = redis.call('ZRANGEBYSCORE', KEYS[1], '(' .. ARGV[1], '+inf', 'WITHSCORES')
+for i = 1, #tokens, 2 do
+    local jti, expires_at = tokens[i], tonumber(tokens[i + 1])
+    redis.call('SET', jti, '', 'EX', math.ceil(expires_at - now))
+    redis.call('ZADD', KEYS[2], expires_at, jti)
+    redis.call('PUBLISH', ARGV[2], jti)
+    table.insert(revoked, jti)
+    table.insert(revoked, tostring(expires_at))
+end
+redis.call('DEL', KEYS[1])
+return revoked
+"""
 
-async def add_jti_to_block_list(jti: str) -> None:
-    """Add token jti string to blocklist with expiration time."""
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
+# GCRA: KEYS[1] holds the theoretical arrival time (TAT) in milliseconds of
+# server time. ARGV[1] is the interval between requests and ARGV[2] the burst
+# tolerance, both in milliseconds. Returns {allowed, retry_after_ms, remaining}.
+RATE_LIMIT_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - tolerance
+if allow_at > now then
+    return {0, allow_at - now, 0}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0, math.floor((now - allow_at) / interval)}
+"""
+
+# a blocking pool waits up to REDIS_POOL_TIMEOUT for a free connection
+# instead of opening more than REDIS_MAX_CONNECTIONS per worker
+redis_pool = aioredis.BlockingConnectionPool.from_url(
+    Config.REDIS_URL,
+    decode_responses=True,
+    max_connections=Config.REDIS_MAX_CONNECTIONS,
+    timeout=Config.REDIS_POOL_TIMEOUT,
+    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=Config.REDIS_SOCKET_CONNECT_TIMEOUT,
+    health_check_interval=Config.REDIS_HEALTH_CHECK_INTERVAL,
+)
+
+
+class TimedPipeline(Pipeline):
+    """Pipeline whose round trip is added to the request's `redis` timing"""
+
+    async def execute(self, raise_on_error: bool = True):
+        with timed("redis"):
+            return await super().execute(raise_on_error)
+
+
+class TimedRedis(aioredis.Redis):
+    """Redis client whose commands are added to the request's `redis` timing"""
+
+    async def execute_command(self, *args, **options):
+        with timed("redis"):
+            return await super().execute_command(*args, **options)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> TimedPipeline:
+        return TimedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+redis_client = TimedRedis(connection_pool=redis_pool)
+
+token_blocklist = redis_client
+
+
+class RevokedTokens:
+    """Per-worker copy of the revoked JTIs.
+
+    Kept current by the blocklist channel and a periodic resync from the
+    blocklist index, so the common not-revoked check needs no network call.
+    Until the first sync completes (or after the channel drops) `synced`
+    is False and callers must ask Redis instead. It also stays False
+    until the index is marked complete: revocations written before the
+    index existed are only plain keys.
+    """
+
+    def __init__(self, redis=token_blocklist):
+        self.redis = redis
+        self.synced = False
+        self.indexed = False
+        self._revoked: Dict[str, float] = {}
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Record a revoked jti until it expires"""
+        self._revoked[jti] = expires_at
+
+    def contains(self, jti: str) -> bool:
+        """Check the local copy for a revoked jti"""
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time()
+
+    async def sync(self) -> None:
+        """Merge the blocklist index into the local copy and drop expired jtis"""
+        now = time()
+        self.indexed = bool(await self.redis.exists(BLOCKLIST_INDEXED_KEY))
+        entries = await self.redis.zrangebyscore(
+            BLOCKLIST_INDEX_KEY, now, "+inf", withscores=True
+        )
+        revoked = {
+            jti: expires_at
+            for jti, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+        revoked.update(entries)
+        self._revoked = revoked
+
+    async def listen(self) -> None:
+        """Follow revocations published by every worker until cancelled"""
+        backoff = 1
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(BLOCKLIST_CHANNEL)
+                await self.sync()
+                self.synced = self.indexed
+                backoff = 1
+                next_sync = monotonic() + Config.BLOCKLIST_SYNC_INTERVAL
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self.add(message["data"], time() + JTI_EXPIRY)
+                    if monotonic() >= next_sync:
+                        await self.sync()
+                        self.synced = self.indexed
+                        next_sync = monotonic() + Config.BLOCKLIST_SYNC_INTERVAL
+            except RedisError as e:
+                logging.warning("token blocklist channel lost: %s", e)
+            finally:
+                self.synced = False
+                await pubsub.aclose()
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+revoked_tokens = RevokedTokens()
+
+
+async def backfill_blocklist_index(
+    redis=token_blocklist, batch_size: int = 1000
+) -> int:
+    """Index blocklist keys written before the index existed and mark the
+    index complete.
+
+    Run it once no worker on the old code is left, because those workers
+    only write plain keys. Returns the number of keys added.
+    """
+    added = 0
+    async for keys in _scan_batches(redis, BLOCKLIST_KEY_PATTERN, batch_size):
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.get(key)
+                pipe.pttl(key)
+            replies = await pipe.execute()
+
+        now = time()
+        entries = {
+            key: now + ttl / 1000
+            for key, value, ttl in zip(keys, replies[::2], replies[1::2])
+            if value == "" and ttl > 0
+        }
+        if entries:
+            added += await redis.zadd(BLOCKLIST_INDEX_KEY, entries)
+    await redis.set(BLOCKLIST_INDEXED_KEY, 1)
+    return added
+
+
+async def _scan_batches(redis, match: str, count: int):
+    batch = []
+    async for key in redis.scan_iter(match=match, count=count):
+        batch.append(key)
+        if len(batch) >= count:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+revoke_user_tokens_script = token_blocklist.register_script(REVOKE_USER_TOKENS_SCRIPT)
+
+rate_limit_script = redis_client.register_script(RATE_LIMIT_SCRIPT)
+
+
+async def add_jti_to_block_list(jti: str, expires_at: Optional[float] = None) -> None:
+    """Add token jti string to blocklist until the token expires."""
+    now = time()
+    if expires_at is None:
+        expires_at = now + JTI_EXPIRY
+    if expires_at <= now:
+        return
+    async with token_blocklist.pipeline(transaction=True) as pipe:
+        pipe.set(name=jti, value="", ex=math.ceil(expires_at - now))
+        pipe.zadd(BLOCKLIST_INDEX_KEY, {jti: expires_at})
+        pipe.zremrangebyscore(BLOCKLIST_INDEX_KEY, "-inf", time())
+        pipe.publish(BLOCKLIST_CHANNEL, jti)
+        await pipe.execute()
+    revoked_tokens.add(jti, expires_at)
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    """Check if a token's jti is in the blocklist."""
+    """Check if a token's jti is in the blocklist.
+
+    Answered locally while the revoked set is synced; Redis is only asked
+    to confirm a local match or when the local copy cannot be trusted.
+    """
+    if revoked_tokens.synced and not revoked_tokens.contains(jti):
+        return False
+
     jti = await token_blocklist.get(jti)
     return jti is not None
+
+
+async def add_jtis_to_block_list(jtis: List[str]) -> None:
+    """Add many token jtis to the blocklist in one round trip."""
+    if not jtis:
+        return
+    expires_at = time() + JTI_EXPIRY
+    async with token_blocklist.pipeline(transaction=True) as pipe:
+        for jti in jtis:
+            pipe.set(name=jti, value="", ex=JTI_EXPIRY)
+            pipe.publish(BLOCKLIST_CHANNEL, jti)
+        pipe.zadd(BLOCKLIST_INDEX_KEY, dict.fromkeys(jtis, expires_at))
+        pipe.zremrangebyscore(BLOCKLIST_INDEX_KEY, "-inf", time())
+        await pipe.execute()
+    for jti in jtis:
+        revoked_tokens.add(jti, expires_at)
+
+
+async def tokens_in_blocklist(jtis: List[str]) -> Dict[str, bool]:
+    """Check many jtis at once with a single MGET for those not settled locally."""
+    result = dict.fromkeys(jtis, False)
+    if revoked_tokens.synced:
+        pending = [jti for jti in jtis if revoked_tokens.contains(jti)]
+    else:
+        pending = list(jtis)
+
+    if pending:
+        values = await token_blocklist.mget(pending)
+        result.update(
+            (jti, value is not None) for jti, value in zip(pending, values)
+        )
+    return result
+
+
+async def record_user_jtis(user_id: str, tokens: Dict[str, float]) -> None:
+    """Remember the jtis issued to a user, with their tokens' expiry, so
+    they can be revoked together."""
+    key = USER_TOKENS_KEY.format(user_id)
+    async with token_blocklist.pipeline(transaction=False) as pipe:
+        pipe.zadd(key, tokens)
+        pipe.zremrangebyscore(key, "-inf", time())
+        # no token outlives JTI_EXPIRY, so neither does the newest entry
+        pipe.expire(key, JTI_EXPIRY)
+        await pipe.execute()
+
+
+async def revoke_user_tokens(user_id: str) -> int:
+    """Blocklist every recorded jti of a user in one round trip.
+
+    Runs as a Lua script, so it assumes a single (non-cluster) Redis.
+    """
+    revoked = await revoke_user_tokens_script(
+        keys=[USER_TOKENS_KEY.format(user_id), BLOCKLIST_INDEX_KEY],
+        args=[time(), BLOCKLIST_CHANNEL],
+    )
+    for jti, expires_at in zip(revoked[::2], revoked[1::2]):
+        revoked_tokens.add(jti, float(expires_at))
+    return len(revoked) // 2
+
+
+async def rate_limit_hit(
+    key: str, interval_ms: int, tolerance_ms: int
+) -> Tuple[bool, int, int]:
+    """Count one request against a GCRA limit in a single round trip.
+
+    Returns whether it is allowed, the milliseconds until the next one
+    would be and how many more fit in the current burst.
+    """
+    allowed, retry_after_ms, remaining = await rate_limit_script(
+        keys=[key], args=[interval_ms, tolerance_ms]
+    )
+    return bool(allowed), retry_after_ms, remaining
+
+
+async def mark_recent_write(principal_id: str) -> None:
+    """Send a principal's reads to the primary for DB_REPLICA_LAG seconds,
+    so they see the write it just made. A no-op without replicas.
+    """
+    if not Config.DATABASE_REPLICA_URLS:
+        return
+    try:
+        await redis_client.set(
+            RECENT_WRITE_KEY.format(principal_id),
+            1,
+            px=int(Config.DB_REPLICA_LAG * 1000),
+        )
+    except RedisError as e:
+        logging.warning("recent write not recorded: %s", e)
+
+
+async def wrote_recently(principal_id: str) -> bool:
+    """Whether a principal wrote within the last DB_REPLICA_LAG seconds"""
+    if not Config.DATABASE_REPLICA_URLS:
+        return False
+    try:
+        return bool(await redis_client.exists(RECENT_WRITE_KEY.format(principal_id)))
+    except RedisError as e:
+        logging.warning("recent writes unavailable, reading from a replica: %s", e)
+        return False
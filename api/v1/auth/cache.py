@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+"""In-process cache of authenticated principals"""
+
+import asyncio
+import json
+import logging
+from typing import Optional
+from redis.exceptions import RedisError
+from api.core.cache import TTLCache
+from api.core.config import Config
+from api.db.redis import redis_client
+from .schema import UserPrincipal
+
+
+PRINCIPAL_CHANNEL = "auth:principals:invalidate"
+
+
+class PrincipalCache:
+    """Bounded TTL cache of principals keyed by email and by user id.
+
+    Entries are only served while this worker is subscribed to the
+    invalidation channel, so a change made through another worker is
+    never missed; the local cache is cleared whenever the subscription
+    is (re)established.
+
+    Every eviction or clear bumps `generation`. Callers read it before
+    loading a principal and pass it to `set`, which skips principals
+    loaded before an invalidation arrived.
+    """
+
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+        self.local = TTLCache(
+            max_entries=Config.PRINCIPAL_CACHE_MAX_ENTRIES,
+            ttl=Config.PRINCIPAL_CACHE_TTL,
+        )
+        self.active = False
+        self.generation = 0
+
+    def get(self, email: str) -> Optional[UserPrincipal]:
+        """Return a cached principal by email"""
+        if not self.active:
+            return None
+        return self.local.get(("email", email))
+
+    def set(self, principal: UserPrincipal, generation: int) -> None:
+        """Cache a principal loaded at `generation` under its email and id"""
+        if not self.active or generation != self.generation:
+            return
+        self.local.set(("email", principal.email), principal)
+        self.local.set(("id", str(principal.id)), principal)
+
+    def evict(self, email: Optional[str] = None, user_id=None) -> None:
+        """Drop a principal from this worker's cache"""
+        self.generation += 1
+        for key in (("email", email), ("id", str(user_id))):
+            principal = self.local.get(key)
+            if principal is not None:
+                self.local.pop(("email", principal.email))
+                self.local.pop(("id", str(principal.id)))
+            self.local.pop(key)
+
+    def clear(self) -> None:
+        """Drop every principal from this worker's cache"""
+        self.generation += 1
+        self.local.clear()
+
+    async def invalidate(self, email: str, user_id) -> None:
+        """Drop a principal here and on every other API worker"""
+        self.evict(email, user_id)
+        message = json.dumps({"email": email, "id": str(user_id)})
+        try:
+            await self.redis.publish(PRINCIPAL_CHANNEL, message)
+        except RedisError as e:
+            logging.warning("principal invalidation not published: %s", e)
+
+    async def listen(self) -> None:
+        """Apply invalidations published by other workers until cancelled"""
+        backoff = 1
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(PRINCIPAL_CHANNEL)
+                self.clear()
+                self.active = True
+                backoff = 1
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is None:
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                        email, user_id = data["email"], data["id"]
+                    except (ValueError, TypeError, KeyError):
+                        # cannot tell whom it was about, so drop everyone
+                        logging.warning(
+                            "malformed principal invalidation: %r", message["data"]
+                        )
+                        self.clear()
+                        continue
+                    self.evict(email, user_id)
+            except RedisError as e:
+                logging.warning("principal invalidation channel lost: %s", e)
+            finally:
+                self.active = False
+                self.clear()
+                await pubsub.aclose()
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+principal_cache = PrincipalCache()
@@ -5,13 +5,16 @@ from fastapi import Request, status, Depends
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from fastapi.exceptions import HTTPException
-from typing import List, Any
+from dataclasses import dataclass
+from typing import List, Any, Optional
 from sqlmodel.ext.asyncio.session import AsyncSession
+from api.core.timing import timed
 from .utils import decode_access_token
 from api.db.redis import token_in_blocklist
 from api.db.database import get_session
 from .service import UserService
-from .models import User
+from .cache import principal_cache
+from .schema import UserPrincipal
 from api.v1.errors import (
     InvalidToken,
     RevokedToken,
@@ -20,12 +23,22 @@ from api.v1.errors import (
     InsufficientPermissions,
     InvalidCredentials,
     AccountNotVerified,
+    UserNotFound,
 )
 
 
 user_service = UserService()
 
 
+@dataclass
+class AuthContext:
+    """Authentication state shared by every dependency of a single request"""
+
+    token: str
+    token_data: dict
+    user: Optional[UserPrincipal] = None
+
+
 class TokenBearer(HTTPBearer):
     """Protects endpoints by requiring a valid access token."""
 
@@ -40,25 +53,23 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
-        token_data = decode_access_token(token)
-
-        if not token_data:
-            raise InvalidToken()
+        context = getattr(request.state, "auth", None)
+        if context is None or context.token != token:
+            with timed("auth"):
+                token_data = decode_access_token(token)
 
-        if not self.valid_token(token):
-            raise InvalidToken()
+                if not token_data:
+                    raise InvalidToken()
 
-        if await token_in_blocklist(token_data["jti"]):
-            raise RevokedToken()
+                if await token_in_blocklist(token_data["jti"]):
+                    raise RevokedToken()
 
-        self.verify_token_data(token_data)
+            context = AuthContext(token=token, token_data=token_data)
+            request.state.auth = context
 
-        return token_data
+        self.verify_token_data(context.token_data)
 
-    def valid_token(self, token: str) -> bool:
-        """validate token"""
-        token_data = decode_access_token(token)
-        return token_data is not None
+        return context.token_data
 
     def verify_token_data(self, token_data):
         """override this method in child classes"""
@@ -83,13 +94,32 @@ class RefreshTokenBearer(TokenBearer):
             raise RefreshTokenRequired()
 
 
+access_token_bearer = AccessTokenBearer()
+refresh_token_bearer = RefreshTokenBearer()
+
+
 async def get_current_user(
-    token_details: dict = Depends(AccessTokenBearer()),
+    request: Request,
+    token_details: dict = Depends(access_token_bearer),
     session: AsyncSession = Depends(get_session),
 ):
     """Get current logged in user details"""
+    context = getattr(request.state, "auth", None)
+    if context is not None and context.user is not None:
+        return context.user
+
     user_email = token_details["user"]["email"]
-    user = await user_service.get_user(user_email, session)
+    with timed("auth"):
+        user = principal_cache.get(user_email)
+        if user is None:
+            generation = principal_cache.generation
+            user = await user_service.get_principal(user_email, session)
+            if user is None:
+                raise UserNotFound()
+            principal_cache.set(user, generation)
+
+    if context is not None:
+        context.user = user
     return user
 
 
@@ -100,7 +130,9 @@ class RoleChecker:
         """Initialize with allowed roles."""
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
+    def __call__(
+        self, current_user: UserPrincipal = Depends(get_current_user)
+    ) -> Any:
         """Check if the user has the required role(s)."""
         if not current_user.isVerified:
             raise AccountNotVerified()
@@ -2,11 +2,14 @@
 """Auth Router Module"""
 
 from fastapi import APIRouter, Depends, Request, status, BackgroundTasks
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from api.core.timing import TimedRoute
 from sqlmodel.ext.asyncio.session import AsyncSession
 from api.db.database import get_session
-from api.v1.celery_tasks import send_email
+from api.v1.mail_dispatch import (
+    dispatch_mail,
+    dispatch_bulk_mail,
+    bulk_mail_progress,
+)
 from .schema import (
     UserCreate,
     UserModel,
@@ -21,58 +24,82 @@ from .service import UserService
 from .utils import (
     create_access_token,
     decode_access_token,
-    verify_password,
+    verify_password_async,
     create_url_safe_token,
     decode_url_safe_token,
-    generate_password_hash,
+    generate_password_hash_async,
     generate_magic_link_token,
-    verify_magic_link_token
+    verify_magic_link_token,
+    token_expiry,
 )
 from datetime import timedelta, datetime
+import uuid
 from fastapi.responses import JSONResponse
 from .dependencies import (
-    RefreshTokenBearer,
-    AccessTokenBearer,
+    refresh_token_bearer,
+    access_token_bearer,
     get_current_user,
     RoleChecker,
 )
-from api.db.redis import add_jti_to_block_list
+from api.db.redis import (
+    add_jti_to_block_list,
+    record_user_jtis,
+    revoke_user_tokens,
+)
 from api.v1.errors import (
     UserAlreadyExists,
     InvalidCredentials,
     InvalidToken,
     UserNotFound,
     PasswordsDoNotMatch,
+    MailJobNotFound,
 )
-from api.v1.mail import mail, create_message
 from api.core.config import Config
+from api.v1.rate_limit import RateLimiter
 
 
-auth_router = APIRouter()
+auth_router = APIRouter(
+    route_class=TimedRoute,
+    dependencies=[Depends(RateLimiter(Config.RATE_LIMIT_AUTH, "auth"))],
+)
 
-limter = Limiter(key_func=get_remote_address)
 user_service = UserService()
 role_checker = RoleChecker(["admin", "user"])
+admin_checker = RoleChecker(["admin"])
 
 REFRESH_TOKEN_EXPIRY_DAYS = 2
 
 
 @auth_router.post("/send_mail")
-@limter.limit("1000/minute")
-async def send_mail(request: Request, emails: EmailModel):
-    """send mail"""
+async def send_mail(
+    request: Request,
+    emails: EmailModel,
+    token_details: dict = Depends(access_token_bearer),
+    _: bool = Depends(admin_checker),
+):
+    """Send mail to every address, fanned out in chunks by the mail worker"""
     email_addresses = emails.email_addresses
 
-    html = "<h1>Welcome to Task Management App</h1>"
-    subject = "Welcome to our App"
+    job = await dispatch_bulk_mail(email_addresses, "welcome")
 
-    send_email.delay(email_addresses, subject, html)
+    return {"message": "Email sent successfully", "job": job}
 
-    return {"message": "Email sent successfully"}
+
+@auth_router.get("/send_mail/{job_id}")
+async def send_mail_progress(
+    request: Request,
+    job_id: str,
+    token_details: dict = Depends(access_token_bearer),
+    _: bool = Depends(admin_checker),
+):
+    """Progress of a /send_mail job"""
+    progress = await bulk_mail_progress(job_id)
+    if progress is None:
+        raise MailJobNotFound()
+    return progress
 
 
 @auth_router.post("/register", status_code=status.HTTP_201_CREATED)
-@limter.limit("1000/minute")
 async def register(
     user_data: UserCreate,
     bg_tasks: BackgroundTasks,
@@ -92,15 +119,7 @@ async def register(
 
     link = f"http://{Config.DOMAIN}/api/v1/auth/verify/{token}"
 
-    html = f"""
-    <h1>Welcome to Task Management</h1>
-    <h2>Verify your email</h2>
-    <p>Click the <a href="{link}">link</a> below to verify your account:</p>
-    """
-    emails = [email]
-    subject = "Verify your email"
-
-    send_email.delay(emails, subject, html)
+    await dispatch_mail([email], "verify_email", {"link": link})
 
     return {
         "message": "User created successfully! Check your email to verify your account",
@@ -109,7 +128,6 @@ async def register(
 
 
 @auth_router.get("/verify/{token}")
-@limter.limit("1000/minute")
 async def verify_email(request: Request, token: str, session: AsyncSession = Depends(get_session)):
     """Verify email route"""
 
@@ -130,7 +148,6 @@ async def verify_email(request: Request, token: str, session: AsyncSession = Dep
 
 
 @auth_router.post("/login", response_model=dict)
-@limter.limit("1000/minute")
 async def login_users(
     user_data: LoginModel, request: Request, session: AsyncSession = Depends(get_session)
 ):
@@ -141,19 +158,29 @@ async def login_users(
     user = await user_service.get_user(email, session)
 
     if user:
-        valid_password = verify_password(password, user.password)
+        valid_password = await verify_password_async(password, user.password)
         if valid_password:
+            access_jti, refresh_jti = str(uuid.uuid4()), str(uuid.uuid4())
             access_token = create_access_token(
                 user_data={
                     "email": user.email,
                     "user_id": str(user.id),
                     "role": user.role,
-                }
+                },
+                jti=access_jti,
             )
             refresh_token = create_access_token(
                 user_data={"email": user.email, "user_id": str(user.id)},
                 refresh=True,
                 expiry=timedelta(days=REFRESH_TOKEN_EXPIRY_DAYS),
+                jti=refresh_jti,
+            )
+            await record_user_jtis(
+                str(user.id),
+                {
+                    access_jti: token_expiry(access_token),
+                    refresh_jti: token_expiry(refresh_token),
+                },
             )
 
             return JSONResponse(
@@ -168,12 +195,17 @@ async def login_users(
 
 
 @auth_router.get("/refresh_token")
-@limter.limit("1000/minute")
-async def get_new_access_token(request: Request, token_details: dict = Depends(RefreshTokenBearer())):
+async def get_new_access_token(request: Request, token_details: dict = Depends(refresh_token_bearer)):
     """Create New Access Token"""
     expiry_timestamp = token_details["exp"]
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
-        new_access_token = create_access_token(user_data=token_details["user"])
+        jti = str(uuid.uuid4())
+        new_access_token = create_access_token(
+            user_data=token_details["user"], jti=jti
+        )
+        await record_user_jtis(
+            token_details["user"]["user_id"], {jti: token_expiry(new_access_token)}
+        )
 
         return JSONResponse(content={"access_token": new_access_token})
 
@@ -181,27 +213,40 @@ async def get_new_access_token(request: Request, token_details: dict = Depends(R
 
 
 @auth_router.get("/me", response_model=UserTask)
-@limter.limit("1000/minute")
 async def get_current_user(request: Request,
-    user=Depends(get_current_user), _: bool = Depends(role_checker)
+    current_user=Depends(get_current_user),
+    _: bool = Depends(role_checker),
+    session: AsyncSession = Depends(get_session),
 ):
     """get current user routes"""
+    user = await user_service.get_user(current_user.email, session, with_tasks=True)
+    if not user:
+        raise UserNotFound()
     return user
 
 
 @auth_router.get("/logout")
-@limter.limit("1000/minute")
-async def revoke_token(request: Request, token_details: dict = Depends(AccessTokenBearer())):
+async def revoke_token(request: Request, token_details: dict = Depends(access_token_bearer)):
     """logout endpoint"""
     jti = token_details["jti"]
-    await add_jti_to_block_list(jti)
+    await add_jti_to_block_list(jti, token_details["exp"])
     return JSONResponse(
         content={"message": "Logout successfully"}, status_code=status.HTTP_200_OK
     )
 
 
+@auth_router.get("/logout-all")
+async def revoke_all_tokens(request: Request, token_details: dict = Depends(access_token_bearer)):
+    """logout from every session of the current user"""
+    revoked = await revoke_user_tokens(token_details["user"]["user_id"])
+    await add_jti_to_block_list(token_details["jti"], token_details["exp"])
+    return JSONResponse(
+        content={"message": "Logout successfully", "revoked_tokens": revoked},
+        status_code=status.HTTP_200_OK,
+    )
+
+
 @auth_router.post("/password-reset-request", status_code=status.HTTP_200_OK)
-@limter.limit("1000/minute")
 async def password_reset_request(request: Request, email_data: PasswordResetRequestModel):
     """Reset Password"""
     email = email_data.email
@@ -210,16 +255,7 @@ async def password_reset_request(request: Request, email_data: PasswordResetRequ
 
     link = f"http://{Config.DOMAIN}/api/v1/auth/password-reset-confirm/{token}"
 
-    html_message = f"""
-    <h1>Reset your password</h1>
-    <p>Click the <a href="{link}">link</a> below to reset your password:</p>
-    """
-
-    message = create_message(
-        recipients=[email], subject="Reset your password", body=html_message
-    )
-
-    await mail.send_message(message)
+    await dispatch_mail([email], "password_reset", {"link": link})
 
     return JSONResponse(
         content={
@@ -230,7 +266,6 @@ async def password_reset_request(request: Request, email_data: PasswordResetRequ
 
 
 @auth_router.post("/password-reset-confirm/{token}", status_code=status.HTTP_200_OK)
-@limter.limit("1000/minute")
 async def reset_password_confirm(
     request: Request,
     token: str,
@@ -253,7 +288,7 @@ async def reset_password_confirm(
         if not user:
             raise UserNotFound()
 
-        password_hash = generate_password_hash(new_password)
+        password_hash = await generate_password_hash_async(new_password)
 
         await user_service.update_user(user, {"password": password_hash}, session)
 
@@ -266,8 +301,11 @@ async def reset_password_confirm(
         status_code=status.HTTP_400_BAD_REQUEST,
     )
 
-@auth_router.post("/magic-link", status_code=status.HTTP_200_OK)
-@limter.limit("5/minute")
+@auth_router.post(
+    "/magic-link",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(RateLimiter(Config.RATE_LIMIT_MAGIC_LINK, "magic-link"))],
+)
 async def send_magic_link(request: Request, email_data: MagicLinkRequestModel):
     email = email_data.email
 
@@ -275,20 +313,22 @@ async def send_magic_link(request: Request, email_data: MagicLinkRequestModel):
 
     link = f"http://{Config.DOMAIN}/api/v1/auth/magic-link-confirm/{token}"
 
-    html_message = f"""
-    <h1>Welcome to Task Management App</h1>
-    <p>Click the <a href="{link}">link</a> below to login:</p>
-    """
-    subject = "Login using magic link"
-    send_email.delay(email, subject, html_message)
+    await dispatch_mail([email], "magic_link", {"link": link})
 
     return JSONResponse(
         content={"message": "Magic link sent successfully"},
         status_code=status.HTTP_200_OK,
     )
 
-@auth_router.post("/magic-link-confirm/{token}", status_code=status.HTTP_200_OK)
-@limter.limit("50/minute")
+@auth_router.post(
+    "/magic-link-confirm/{token}",
+    status_code=status.HTTP_200_OK,
+    dependencies=[
+        Depends(
+            RateLimiter(Config.RATE_LIMIT_MAGIC_LINK_CONFIRM, "magic-link-confirm")
+        )
+    ],
+)
 async def magic_link_confirm(request: Request, token: str):
     token_data = verify_magic_link_token(token)
     email = token_data.get("email")
@@ -4,9 +4,11 @@
 from datetime import datetime
 from typing import Optional, List
 import uuid
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, conlist
 from api.v1.tasks.schema import TaskCreate
 
+MAIL_MAX_RECIPIENTS = 1000
+
 
 class UserModel(BaseModel):
     """User data Model"""
@@ -20,6 +22,16 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+class UserPrincipal(BaseModel):
+    """Column-only projection of the authenticated user"""
+
+    id: uuid.UUID
+    username: str
+    email: str
+    role: str
+    isVerified: bool
+
+
 class UserTask(UserModel):
     """User data Model with tasks"""
 
@@ -49,7 +61,7 @@ class LoginModel(BaseModel):
 
 
 class EmailModel(BaseModel):
-    email_addresses: List[str]
+    email_addresses: conlist(EmailStr, min_length=1, max_length=MAIL_MAX_RECIPIENTS)
 
 
 class PasswordResetRequestModel(BaseModel):
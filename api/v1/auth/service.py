@@ -1,24 +1,49 @@
 #!/usr/bin/python3
 """Service module for User"""
 
+from typing import Optional
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload, raiseload
 from .models import User
-from .schema import UserCreate
-from .utils import generate_password_hash
+from .schema import UserCreate, UserPrincipal
+from .utils import generate_password_hash_async
+from .cache import principal_cache
+
+
+PRINCIPAL_FIELDS = {"role", "isVerified", "password"}
 
 
 class UserService:
     """Class Auth to handle authentication logic"""
 
-    async def get_user(self, email: str, session: AsyncSession):
-        """Get user from database by email"""
+    async def get_user(
+        self, email: str, session: AsyncSession, with_tasks: bool = False
+    ):
+        """Get user from database by email.
 
-        statement = select(User).where(User.email == email)
+        Tasks are only loaded when `with_tasks` is set; otherwise touching
+        `user.tasks` raises instead of silently issuing a query.
+        """
+
+        loader = selectinload(User.tasks) if with_tasks else raiseload(User.tasks)
+        statement = select(User).where(User.email == email).options(loader)
         result = await session.exec(statement)
         user = result.first()
         return user
 
+    async def get_principal(
+        self, email: str, session: AsyncSession
+    ) -> Optional[UserPrincipal]:
+        """Get the columns needed to authorize a request, without relationships"""
+
+        statement = select(
+            User.id, User.username, User.email, User.role, User.isVerified
+        ).where(User.email == email)
+        result = await session.exec(statement)
+        row = result.first()
+        return UserPrincipal(**row._mapping) if row is not None else None
+
     async def user_exists(self, email, session: AsyncSession):
         """Check whether the user exists method"""
         user = await self.get_user(email, session)
@@ -29,7 +54,9 @@ class UserService:
         """Create a new user"""
         user_data_dict = dict(user_data)
         new_user = User(**user_data_dict)
-        new_user.password = generate_password_hash(user_data_dict["password"])
+        new_user.password = await generate_password_hash_async(
+            user_data_dict["password"]
+        )
         new_user.role = "user"
         session.add(new_user)
         await session.commit()
@@ -42,4 +69,7 @@ class UserService:
             setattr(user, key, value)
         await session.commit()
         await session.refresh(user)
+
+        if PRINCIPAL_FIELDS.intersection(user_data):
+            await principal_cache.invalidate(user.email, user.id)
         return user
@@ -1,12 +1,16 @@
 #!/usr/bin/python3
 """Password Hashing Module"""
 
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import timedelta, datetime
 import uuid
 import logging
 from passlib.context import CryptContext
 import jwt
 from api.core.config import Config
+from api.v1.errors import ServiceBusy
 from itsdangerous import URLSafeTimedSerializer
 
 
@@ -26,8 +30,90 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return password_context.verify(password, hashed_password)
 
 
+class PasswordHasher:
+    """Run bcrypt on a dedicated bounded thread pool.
+
+    bcrypt releases the GIL, so worker threads hash in parallel while the
+    event loop keeps serving requests. Once `max_pending` operations are
+    queued or running, new ones are rejected with ServiceBusy instead of
+    piling up behind a login storm. An operation counts as pending until
+    its thread finishes, even if the request awaiting it was cancelled.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    async def _run(self, func, *args):
+        """Run func on the pool, applying backpressure"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ServiceBusy()
+            self._pending += 1
+
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, future: Future) -> None:
+        # runs on the pool thread once func returns, raises or is cancelled
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password off the event loop"""
+        return await self._run(generate_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Verify a password off the event loop"""
+        return await self._run(verify_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        """Queue depth and throughput counters"""
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": min(self._pending, self.max_workers),
+            "queued": max(self._pending - self.max_workers, 0),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def generate_password_hash_async(password: str) -> str:
+    """Generate password hash on the password hashing pool"""
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Verify password on the password hashing pool"""
+    return await password_hasher.verify(password, hashed_password)
+
+
 def create_access_token(
-    user_data: dict, expiry: timedelta = None, refresh: bool = False
+    user_data: dict, expiry: timedelta = None, refresh: bool = False, jti: str = None
 ):
     """Create JWT access token"""
     payload = {}
@@ -37,7 +123,7 @@ def create_access_token(
         expiry if expiry is not None else timedelta(seconds=ACCESS_TOKEN_EXPIRY)
     )
 
-    payload["jti"] = str(uuid.uuid4())
+    payload["jti"] = jti if jti is not None else str(uuid.uuid4())
 
     payload["refresh"] = refresh
 
@@ -64,6 +150,11 @@ def decode_access_token(token: str) -> dict:
         return None
 
 
+def token_expiry(token: str) -> float:
+    """The `exp` claim of a token this service has just issued"""
+    return jwt.decode(token, options={"verify_signature": False})["exp"]
+
+
 salt = "email-configuration"
 
 serializer = URLSafeTimedSerializer(secret_key=Config.JWT_SECRET, salt=salt)
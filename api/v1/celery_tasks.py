@@ -1,19 +1,279 @@
 #!/usr/bin/python3
 """Celery Task Module"""
-from typing import List
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from time import time
+from typing import List, Optional
 from celery import Celery
+from celery.signals import worker_process_init
+from jinja2 import TemplateError
+from fastapi_mail import MessageSchema
+from starlette.concurrency import run_in_threadpool
 from api.core.config import Config
-from api.v1.mail import mail, create_message
-from asgiref.sync import async_to_sync
+from api.db.redis import redis_client
+from api.v1.mail import (
+    create_message,
+    mail_templates,
+    smtp_pool,
+    MAIL_OUTBOX_KEY,
+    MAIL_DRAIN_SCHEDULED_KEY,
+    MAIL_DRAIN_FLAG_TTL,
+    MAIL_RETRY_DELAY,
+    MAIL_PROCESSING_KEY,
+    MAIL_LEASES_KEY,
+    MAIL_DRAIN_LEASE,
+    MAIL_DEAD_LETTER_KEY,
+)
+
+# KEYS: outbox, this drain's processing list, drain leases.
+# ARGV: batch size, drain id, lease deadline.
+CLAIM_MAIL_SCRIPT = """
+local batch = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #batch > 0 then
+    redis.call('LTRIM', KEYS[1], #batch, -1)
+    redis.call('RPUSH', KEYS[2], unpack(batch))
+    redis.call('ZADD', KEYS[3], ARGV[3], ARGV[2])
+end
+return batch
+"""
+
+# KEYS: drain leases, outbox. ARGV: now, processing key prefix.
+# Processing keys are built in the script, so it assumes a single Redis.
+RECOVER_MAIL_SCRIPT = """
+local recovered = 0
+for _, drain in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])) do
+    local processing = ARGV[2] .. drain
+    local entries = redis.call('LRANGE', processing, 0, -1)
+    if #entries > 0 then
+        redis.call('RPUSH', KEYS[2], unpack(entries))
+        recovered = recovered + #entries
+    end
+    redis.call('DEL', processing)
+    redis.call('ZREM', KEYS[1], drain)
+end
+return recovered
+"""
 
 c_app = Celery()
 
 c_app.config_from_object(Config)
 
+# picks up mail whose scheduled drain was lost; run `celery beat` with the workers
+c_app.conf.beat_schedule = {
+    "drain-mail-outbox": {
+        "task": "api.v1.celery_tasks.drain_mail_queue",
+        "schedule": Config.MAIL_DRAIN_INTERVAL,
+    },
+}
+
+claim_mail_script = redis_client.register_script(CLAIM_MAIL_SCRIPT)
+recover_mail_script = redis_client.register_script(RECOVER_MAIL_SCRIPT)
+
+
+class WorkerLoop:
+    """One long-lived event loop per worker process.
+
+    Tasks run their coroutines on it instead of a fresh loop per call, so
+    pooled SMTP and Redis connections survive between tasks.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+
+    def run(self, coroutine):
+        """Run a coroutine on the loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()).result()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # a loop thread does not survive the worker's fork
+            if self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="mail-loop", daemon=True
+                ).start()
+                self._pid = os.getpid()
+            return self._loop
+
+
+worker_loop = WorkerLoop()
+
+
+@worker_process_init.connect
+def load_mail_templates(**kwargs):
+    """Compile the email templates once when a worker process starts"""
+    mail_templates.load()
+
 
 @c_app.task
 def send_email(recipients: List[str], subject: str, body: str):
     """Send email"""
     message = create_message(recipients=recipients, subject=subject, body=body)
-    async_to_sync(mail.send_message)(message)
-    print("Email sent successfully")
+    return worker_loop.run(smtp_pool.send(message))
+
+
+@c_app.task(
+    bind=True,
+    max_retries=Config.MAIL_MAX_ATTEMPTS - 1,
+    rate_limit=Config.MAIL_FANOUT_RATE_LIMIT,
+)
+def send_email_chunk(
+    self, recipients: List[str], template: str, params: dict, sent: int = 0
+):
+    """Send one email per recipient of a bulk mail chunk.
+
+    The template is rendered once per chunk. Recipients that failed are
+    retried with backoff; after the last attempt they are reported in the
+    result.
+    """
+    subject = mail_templates.subjects[template]
+    body = mail_templates.render(template, params)
+    messages = [create_message([recipient], subject, body) for recipient in recipients]
+    recipient_of = dict(zip(map(id, messages), recipients))
+    failed = worker_loop.run(smtp_pool.send_many(messages))
+    sent += len(messages) - len(failed)
+    failed_recipients = [recipient_of[id(message)] for message in failed]
+
+    if failed_recipients and self.request.retries < self.max_retries:
+        raise self.retry(
+            args=(failed_recipients, template, params),
+            kwargs={"sent": sent},
+            countdown=MAIL_RETRY_DELAY * 2**self.request.retries,
+        )
+    return {"sent": sent, "failed": failed_recipients}
+
+
+@c_app.task
+def drain_mail_queue():
+    """Send queued emails in batches over pooled SMTP connections"""
+    sent = worker_loop.run(drain_outbox())
+    logging.info("mail outbox drained: %s sent", sent)
+    return sent
+
+
+async def schedule_drain(countdown: float, force: bool = False) -> None:
+    """Schedule one drain of the outbox unless one is already pending.
+
+    A burst of dispatches within `countdown` seconds is sent as batches by
+    a single drain task.
+    """
+    if await redis_client.set(
+        MAIL_DRAIN_SCHEDULED_KEY, 1, nx=not force, ex=MAIL_DRAIN_FLAG_TTL
+    ):
+        # publishing to the broker is blocking I/O
+        await run_in_threadpool(drain_mail_queue.apply_async, countdown=countdown)
+
+
+async def drain_outbox(batch_size: int = Config.MAIL_BATCH_SIZE) -> int:
+    """Claim and send outbox batches until it is empty.
+
+    A batch is moved to this drain's processing list under a lease and
+    only dropped once settled, so the emails of a drain lost mid-batch
+    are requeued by the next drain once its lease expires: delivery is
+    at least once. Emails that fail go back on the outbox for a later
+    drain, until MAIL_MAX_ATTEMPTS. Entries that cannot be decoded are
+    moved to the dead-letter list instead of blocking the outbox.
+    """
+    recovered = await recover_mail_script(
+        keys=[MAIL_LEASES_KEY, MAIL_OUTBOX_KEY],
+        args=[time(), MAIL_PROCESSING_KEY.format("")],
+    )
+    if recovered:
+        logging.warning("requeued %s emails of a lost mail drain", recovered)
+
+    drain_id = uuid.uuid4().hex
+    processing = MAIL_PROCESSING_KEY.format(drain_id)
+    sent, failed = 0, []
+    while True:
+        batch = await claim_mail_script(
+            keys=[MAIL_OUTBOX_KEY, processing, MAIL_LEASES_KEY],
+            args=[batch_size, drain_id, time() + MAIL_DRAIN_LEASE],
+        )
+        if batch:
+            entries, messages, dead = [], [], []
+            for raw in batch:
+                entry = _decode_entry(raw)
+                if entry is None:
+                    dead.append(raw)
+                    continue
+                message = _build_message(entry)
+                if message is not None:
+                    entries.append(entry)
+                    messages.append(message)
+            entry_of = {id(message): entry for message, entry in zip(messages, entries)}
+            rejected = await smtp_pool.send_many(messages)
+            failed.extend(entry_of[id(message)] for message in rejected)
+            sent += len(entries) - len(rejected)
+            await _settle(processing, failed, dead)
+            continue
+
+        requeued = await _requeue(failed) if failed else 0
+        await _release(drain_id)
+        if requeued:
+            await schedule_drain(MAIL_RETRY_DELAY, force=True)
+            return sent
+
+        # let the next dispatch schedule a drain, then pick up anything
+        # queued between the last pop and clearing the flag
+        await redis_client.delete(MAIL_DRAIN_SCHEDULED_KEY)
+        if not await redis_client.llen(MAIL_OUTBOX_KEY):
+            return sent
+        failed = []
+
+
+def _decode_entry(raw: str) -> Optional[dict]:
+    try:
+        entry = json.loads(raw)
+    except ValueError:
+        entry = None
+    if not isinstance(entry, dict):
+        logging.error("undecodable outbox entry moved to %s", MAIL_DEAD_LETTER_KEY)
+        return None
+    return entry
+
+
+def _build_message(entry: dict) -> Optional[MessageSchema]:
+    try:
+        return mail_templates.create_message(
+            entry["recipients"], entry["template"], entry["params"]
+        )
+    except (KeyError, TemplateError) as e:
+        logging.error("email to %s dropped: %r", entry.get("recipients"), e)
+        return None
+
+
+async def _settle(processing: str, failed: List[dict], dead: List[str]) -> None:
+    # only the failures, requeued once the outbox is empty, stay claimed
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(processing)
+        if failed:
+            pipe.rpush(processing, *map(json.dumps, failed))
+        if dead:
+            pipe.rpush(MAIL_DEAD_LETTER_KEY, *dead)
+        await pipe.execute()
+
+
+async def _release(drain_id: str) -> None:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(MAIL_PROCESSING_KEY.format(drain_id))
+        pipe.zrem(MAIL_LEASES_KEY, drain_id)
+        await pipe.execute()
+
+
+async def _requeue(entries: List[dict]) -> int:
+    retry = []
+    for entry in entries:
+        entry["attempts"] = entry.get("attempts", 1) + 1
+        if entry["attempts"] > Config.MAIL_MAX_ATTEMPTS:
+            logging.error("email to %s dropped", entry.get("recipients"))
+        else:
+            retry.append(json.dumps(entry))
+    if retry:
+        await redis_client.rpush(MAIL_OUTBOX_KEY, *retry)
+    return len(retry)
@@ -80,13 +80,55 @@ class PasswordsDoNotMatch(TaskException):
     pass
 
 
+class InvalidCursor(TaskException):
+    """pagination cursor is malformed"""
+
+    pass
+
+
+class InvalidPagination(TaskException):
+    """skip was given with cursor pagination"""
+
+    pass
+
+
+class InvalidImportFile(TaskException):
+    """uploaded import file cannot be read"""
+
+    pass
+
+
+class ServiceBusy(TaskException):
+    """server is at capacity for this operation"""
+
+    pass
+
+
+class MailJobNotFound(TaskException):
+    """bulk mail job not found"""
+
+    pass
+
+
+class RateLimited(TaskException):
+    """client has exceeded the rate limit of a route"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(retry_after)
+        self.headers = {"Retry-After": str(retry_after)}
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
     """Create exception handler"""
 
     async def exception_handler(request: Request, exc: TaskException):
-        return JSONResponse(status_code=status_code, content=initial_detail)
+        return JSONResponse(
+            status_code=status_code,
+            content=initial_detail,
+            headers=getattr(exc, "headers", None),
+        )
 
     return exception_handler
 
@@ -218,6 +260,78 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid pagination cursor",
+                "error_code": "INVALID_CURSOR",
+                "resolution": "Please use the next_cursor value returned by the previous page",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidPagination,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "skip cannot be combined with cursor pagination",
+                "error_code": "INVALID_PAGINATION",
+                "resolution": "Please page with next_cursor instead of skip",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidImportFile,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Import file cannot be read",
+                "error_code": "INVALID_IMPORT_FILE",
+                "resolution": "Please upload UTF-8 encoded NDJSON or CSV",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ServiceBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Service is busy",
+                "error_code": "SERVICE_BUSY",
+                "resolution": "Please try again shortly",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        MailJobNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Mail job not found",
+                "error_code": "MAIL_JOB_NOT_FOUND",
+                "resolution": "Please check the job ID returned by /send_mail",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        RateLimited,
+        create_exception_handler(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            initial_detail={
+                "message": "Too many requests",
+                "error_code": "RATE_LIMITED",
+                "resolution": "Please retry after the time in the Retry-After header",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_error_handler(request, exc):
         return JSONResponse(
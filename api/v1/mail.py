@@ -1,14 +1,39 @@
 #!/usr/bin/python3
 """Mail Module"""
 
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from time import monotonic
+from typing import Dict, List, Optional
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
+from fastapi_mail.fastmail import email_dispatched
 from api.core.config import Config
 from pathlib import Path
-from typing import List
 
 
 BASE_DIR = Path(__file__).resolve().parent
 
+# emails waiting for the mail worker's drain task
+MAIL_OUTBOX_KEY = "mail:outbox"
+MAIL_DRAIN_SCHEDULED_KEY = "mail:outbox:drain-scheduled"
+# a worker lost mid-drain blocks new drains for at most this long
+MAIL_DRAIN_FLAG_TTL = 60
+MAIL_RETRY_DELAY = 30
+# entries a drain has claimed and not yet settled, per drain, and the
+# deadline by which each drain must settle its current batch
+MAIL_PROCESSING_KEY = "mail:outbox:processing:{}"
+MAIL_LEASES_KEY = "mail:outbox:leases"
+MAIL_DRAIN_LEASE = 600
+# entries that are not valid JSON objects, kept for inspection
+MAIL_DEAD_LETTER_KEY = "mail:outbox:dead"
+
 
 mail_config = ConnectionConfig(
     MAIL_USERNAME=Config.MAIL_USERNAME,
@@ -21,6 +46,7 @@ mail_config = ConnectionConfig(
     USE_CREDENTIALS=Config.USE_CREDENTIALS,
     VALIDATE_CERTS=Config.VALIDATE_CERTS,
     MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
+    SUPPRESS_SEND=Config.MAIL_SUPPRESS_SEND,
     TEMPLATE_FOLDER=Path(BASE_DIR, "templates"),
 )
 
@@ -37,3 +63,253 @@ def create_message(recipients: List[str], subject: str, body: str):
     )
 
     return message
+
+
+def build_mime(message: MessageSchema, sender: str) -> MIMEMultipart:
+    """Render a message as the MIME email FastMail would send.
+
+    Covers the body, recipients, subject, cc, bcc, reply-to and custom
+    headers; attachments are not supported.
+    """
+    if message.attachments:
+        raise ValueError("attachments are not supported by the mail worker")
+
+    mime = MIMEMultipart(message.multipart_subtype.value)
+    mime.set_charset(message.charset)
+    if message.body:
+        mime.attach(
+            MIMEText(
+                message.body, _subtype=message.subtype.value, _charset=message.charset
+            )
+        )
+    mime["Date"] = formatdate(localtime=True)
+    mime["Message-ID"] = make_msgid()
+    mime["To"] = ", ".join(message.recipients)
+    mime["From"] = sender
+    if message.subject:
+        mime["Subject"] = message.subject
+    for header, addresses in (
+        ("Cc", message.cc),
+        ("Bcc", message.bcc),
+        ("Reply-To", message.reply_to),
+    ):
+        if addresses:
+            mime[header] = ", ".join(addresses)
+    for name, value in (message.headers or {}).items():
+        mime.add_header(name, value)
+    return mime
+
+
+# template name -> subject; the body is templates/<name>.html
+MAIL_SUBJECTS = {
+    "welcome": "Welcome to our App",
+    "verify_email": "Verify your email",
+    "password_reset": "Reset your password",
+    "magic_link": "Login using magic link",
+}
+
+
+class MailTemplates:
+    """Jinja email templates, compiled once per process and cached.
+
+    The API only queues a template name and its parameters; templates are
+    loaded and rendered by the mail worker.
+    """
+
+    def __init__(self, folder: Path, subjects: Dict[str, str] = MAIL_SUBJECTS):
+        self.subjects = subjects
+        self.env = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+        )
+        self._compiled: Dict[str, Template] = {}
+
+    def load(self) -> None:
+        """Compile every template ahead of the first email"""
+        for name in self.subjects:
+            self._template(name)
+
+    def render(self, name: str, params: dict) -> str:
+        """Render a template's body"""
+        return self._template(name).render(**params)
+
+    def create_message(self, recipients: List[str], name: str, params: dict):
+        """Create a message from a template"""
+        body = self.render(name, params)
+        return create_message(recipients, self.subjects[name], body)
+
+    def _template(self, name: str) -> Template:
+        template = self._compiled.get(name)
+        if template is None:
+            if name not in self.subjects:
+                raise KeyError(f"unknown mail template {name!r}")
+            template = self._compiled[name] = self.env.get_template(f"{name}.html")
+        return template
+
+
+mail_templates = MailTemplates(mail_config.TEMPLATE_FOLDER)
+
+
+# errors about a single message; the connection stays usable
+REJECTED = (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused)
+
+
+class PooledConnection:
+    """An authenticated SMTP connection and its usage"""
+
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = monotonic()
+
+
+class SMTPPool:
+    """Reusable authenticated SMTP connections for the mail worker.
+
+    Connections are kept open between messages and replaced after
+    `max_messages` sends or `max_idle` seconds unused, since servers cap
+    both. A pool belongs to one event loop; it starts over in a forked
+    process.
+    """
+
+    def __init__(
+        self,
+        config: ConnectionConfig,
+        size: int = Config.MAIL_POOL_SIZE,
+        max_messages: int = Config.MAIL_CONNECTION_MAX_MESSAGES,
+        max_idle: float = Config.MAIL_CONNECTION_MAX_IDLE,
+    ):
+        self.config = config
+        self.size = size
+        self.max_messages = max_messages
+        self.max_idle = max_idle
+        self.stats = {"connections": 0, "sent": 0, "failed": 0}
+        self._pid = None
+        self._idle: List[PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def send(self, message: MessageSchema) -> bool:
+        """Send one message over a pooled connection; False if it failed"""
+        return not await self.send_many([message])
+
+    async def send_many(self, messages: List[MessageSchema]) -> List[MessageSchema]:
+        """Send messages over up to `size` connections at once.
+
+        Returns the messages that could not be sent.
+        """
+        groups = [messages[index :: self.size] for index in range(self.size)]
+        results = await asyncio.gather(
+            *(self._send_group(group) for group in groups if group)
+        )
+        return [message for failed in results for message in failed]
+
+    async def close(self) -> None:
+        """Close every idle connection"""
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._quit(connection)
+
+    async def _send_group(self, messages: List[MessageSchema]) -> List[MessageSchema]:
+        failed = []
+        pending = list(messages)
+        # a pooled connection may have been dropped by the server while idle
+        reconnects = 1
+        while pending:
+            try:
+                async with self._connection() as connection:
+                    while pending and connection.sent < self.max_messages:
+                        message = pending[0]
+                        try:
+                            await self._deliver(connection, message)
+                        except REJECTED as e:
+                            logging.error(
+                                "email to %s rejected: %s", message.recipients, e
+                            )
+                            failed.append(message)
+                            self.stats["failed"] += 1
+                        pending.pop(0)
+            except (aiosmtplib.SMTPException, OSError) as e:
+                if reconnects:
+                    reconnects -= 1
+                    continue
+                logging.warning("SMTP connection failed: %s", e)
+                self.stats["failed"] += len(pending)
+                failed.extend(pending)
+                break
+        return failed
+
+    async def _deliver(self, connection: PooledConnection, message: MessageSchema):
+        mime = build_mime(message, self._sender())
+        if not self.config.SUPPRESS_SEND:
+            await connection.smtp.send_message(mime)
+        connection.sent += 1
+        self.stats["sent"] += 1
+        email_dispatched.send(mime)
+
+    def _sender(self) -> str:
+        if self.config.MAIL_FROM_NAME is not None:
+            return f"{self.config.MAIL_FROM_NAME} <{self.config.MAIL_FROM}>"
+        return self.config.MAIL_FROM
+
+    @asynccontextmanager
+    async def _connection(self):
+        if self._pid != os.getpid():
+            # connections and the semaphore of a parent process are unusable
+            self._pid = os.getpid()
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.size)
+
+        async with self._slots:
+            connection = await self._checkout()
+            try:
+                yield connection
+            except BaseException:
+                await self._quit(connection)
+                raise
+            if connection.sent < self.max_messages:
+                connection.last_used = monotonic()
+                self._idle.append(connection)
+            else:
+                await self._quit(connection)
+
+    async def _checkout(self) -> PooledConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            stale = monotonic() - connection.last_used > self.max_idle
+            if not stale and (
+                self.config.SUPPRESS_SEND or connection.smtp.is_connected
+            ):
+                return connection
+            await self._quit(connection)
+        return PooledConnection(await self._connect())
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            timeout=self.config.TIMEOUT,
+            port=self.config.MAIL_PORT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+        )
+        if not self.config.SUPPRESS_SEND:
+            await smtp.connect()
+            if self.config.USE_CREDENTIALS:
+                await smtp.login(
+                    self.config.MAIL_USERNAME,
+                    self.config.MAIL_PASSWORD,
+                )
+        self.stats["connections"] += 1
+        return smtp
+
+    async def _quit(self, connection: PooledConnection) -> None:
+        if self.config.SUPPRESS_SEND or not connection.smtp.is_connected:
+            return
+        try:
+            await connection.smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+
+smtp_pool = SMTPPool(mail_config)
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Outgoing mail dispatch
+
+Every email the API sends goes through `dispatch_mail`, which only
+queues a template name and its parameters on the Redis outbox; the mail
+worker renders and sends queued emails in batches, so neither rendering
+nor SMTP runs in the request path. Mail to many recipients
+goes through `dispatch_bulk_mail`, which fans out into chunk tasks.
+"""
+
+import json
+from typing import List, Optional
+from celery import group
+from celery.result import GroupResult
+from starlette.concurrency import run_in_threadpool
+from api.core.config import Config
+from api.db.redis import redis_client
+from api.v1.celery_tasks import c_app, schedule_drain, send_email_chunk
+from api.v1.mail import MAIL_OUTBOX_KEY, MAIL_SUBJECTS
+
+
+def _check_template(template: str) -> None:
+    if template not in MAIL_SUBJECTS:
+        raise ValueError(f"unknown mail template {template!r}")
+
+
+async def dispatch_mail(
+    recipients: List[str], template: str, params: Optional[dict] = None
+) -> None:
+    """Queue a templated email and return without waiting for SMTP"""
+    _check_template(template)
+    entry = {
+        "recipients": list(recipients),
+        "template": template,
+        "params": params or {},
+    }
+    await redis_client.rpush(MAIL_OUTBOX_KEY, json.dumps(entry))
+    await schedule_drain(Config.MAIL_BATCH_DELAY)
+
+
+async def dispatch_bulk_mail(
+    recipients: List[str],
+    template: str,
+    params: Optional[dict] = None,
+    chunk_size: int = Config.MAIL_FANOUT_CHUNK_SIZE,
+) -> dict:
+    """Fan a templated email out to many recipients as a group of chunk tasks.
+
+    Each recipient gets their own message. Returns the group id to poll
+    with `bulk_mail_progress`.
+    """
+    _check_template(template)
+    chunks = [
+        list(recipients[start : start + chunk_size])
+        for start in range(0, len(recipients), chunk_size)
+    ]
+    job = group(send_email_chunk.s(chunk, template, params or {}) for chunk in chunks)
+
+    def start() -> GroupResult:
+        result = job.apply_async()
+        result.save()
+        return result
+
+    result = await run_in_threadpool(start)
+    return {"id": result.id, "recipients": len(recipients), "chunks": len(chunks)}
+
+
+async def bulk_mail_progress(group_id: str):
+    """Chunks done and emails sent so far, or None for an unknown group"""
+
+    def progress():
+        result = GroupResult.restore(group_id, app=c_app)
+        if result is None:
+            return None
+
+        done = [chunk for chunk in result.results if chunk.ready()]
+        finished = [chunk.result for chunk in done if chunk.successful()]
+        return {
+            "id": group_id,
+            "chunks": len(result.results),
+            "completed_chunks": len(done),
+            "failed_chunks": len(done) - len(finished),
+            "sent": sum(chunk["sent"] for chunk in finished),
+            "failed_recipients": sum(len(chunk["failed"]) for chunk in finished),
+            "done": len(done) == len(result.results),
+        }
+
+    # the result backend client is blocking
+    return await run_in_threadpool(progress)
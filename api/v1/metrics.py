@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+"""Runtime metrics of the worker serving the request"""
+
+from fastapi import APIRouter, Depends
+from api.core.timing import TimedRoute
+from api.db.database import async_engine, get_pool_stats, replica_engines
+from api.v1.auth.dependencies import RoleChecker
+from api.v1.auth.utils import password_hasher
+from api.v1.tasks.cache import task_cache
+
+
+metrics_router = APIRouter(route_class=TimedRoute)
+admin_checker = RoleChecker(["admin"])
+
+
+@metrics_router.get("/", dependencies=[Depends(admin_checker)])
+async def get_metrics():
+    """Connection pool, cache and password hashing counters of this worker"""
+    return {
+        "db_pool": get_pool_stats(async_engine),
+        "db_replica_pools": [get_pool_stats(engine) for engine in replica_engines],
+        "task_cache": task_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+    }
@@ -1,30 +1,112 @@
 #!/usr/bin/python3
 """Register Middleware Module"""
 
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter
 from fastapi import FastAPI
 from fastapi.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from time import time
-import logging
+from api.core.config import Config
+from api.core.timing import start_request_timings
+
+
+# the structured access log below replaces uvicorn's
+logging.getLogger("uvicorn.access").disabled = True
+
+access_logger = logging.getLogger("api.access")
+access_logger.propagate = False
+access_logger.setLevel(logging.INFO)
+
+
+class JSONFormatter(logging.Formatter):
+    """Render access log records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+        }
+        entry.update(getattr(record, "access", {}))
+        return json.dumps(entry, separators=(",", ":"))
+
+
+class AccessLogQueueHandler(QueueHandler):
+    """Hand records to the listener thread untouched and never block.
 
+    Formatting happens on the listener thread; when the queue is full the
+    record is dropped and counted instead of stalling the event loop.
+    """
 
-logger = logging.getLogger("uvicorn.access")
-logger.disabled = True
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def create_access_log_listener(stream=None) -> QueueListener:
+    """Attach the queue handler to the access logger.
+
+    The returned listener writes the JSON lines and must be started and
+    stopped with the application.
+    """
+    log_queue = queue.Queue(maxsize=Config.ACCESS_LOG_QUEUE_SIZE)
+    stream_handler = logging.StreamHandler(stream or sys.stdout)
+    stream_handler.setFormatter(JSONFormatter())
+
+    for handler in list(access_logger.handlers):
+        access_logger.removeHandler(handler)
+    access_logger.addHandler(AccessLogQueueHandler(log_queue))
+    return QueueListener(log_queue, stream_handler)
+
+
+def should_log(status_code: int, duration_ms: float) -> bool:
+    """Sample access log entries; errors and slow requests are always kept"""
+    if status_code >= 500 or duration_ms >= Config.ACCESS_LOG_SLOW_MS:
+        return True
+    return random.random() < Config.ACCESS_LOG_SAMPLE_RATE
 
 
 def register_middleware(app: FastAPI):
     """Register Middleware"""
 
     @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        """Custom Logging Middleware for API"""
-
-        start_time = time()
+    async def access_log(request: Request, call_next):
+        """Structured access log with a per-request timing breakdown"""
+        timings = start_request_timings()
+        started = perf_counter()
         response = await call_next(request)
-        process_time = time() - start_time
-        message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url} - {response.status_code} - completed in {process_time}s"
-        print(message)
+        duration_ms = (perf_counter() - started) * 1000
+
+        if Config.ACCESS_LOG_ENABLED and should_log(response.status_code, duration_ms):
+            client = request.client
+            access_logger.info(
+                "request",
+                extra={
+                    "access": {
+                        "client": f"{client.host}:{client.port}" if client else None,
+                        "method": request.method,
+                        "path": request.url.path,
+                        "status": response.status_code,
+                        "duration_ms": round(duration_ms, 3),
+                        "timings": timings.as_dict(),
+                    }
+                },
+            )
         return response
 
     app.add_middleware(
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Rate Limit Module
+
+Limits are shared by every worker: each check is one atomic GCRA script
+call in Redis, keyed by limiter name, route and client or user.
+"""
+
+import logging
+import math
+from typing import Tuple
+from fastapi import Depends, Request
+from redis.exceptions import RedisError
+from api.core.config import Config
+from api.db.redis import rate_limit_hit
+from api.v1.auth.dependencies import access_token_bearer
+from api.v1.errors import RateLimited
+
+
+RATE_LIMIT_KEY = "ratelimit:{}:{}:{}:{}"
+
+PERIODS = {
+    "s": 1,
+    "second": 1,
+    "m": 60,
+    "minute": 60,
+    "h": 3600,
+    "hour": 3600,
+    "d": 86400,
+    "day": 86400,
+}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a rate such as "100/minute" or "60/m" into (requests, seconds)"""
+    count, _, period = rate.partition("/")
+    try:
+        requests, seconds = int(count), PERIODS[period.strip().lower()]
+    except (KeyError, ValueError):
+        raise ValueError(f"invalid rate limit: {rate!r}") from None
+    if requests < 1:
+        raise ValueError(f"invalid rate limit: {rate!r}")
+    return requests, seconds
+
+
+class RateLimiter:
+    """Limit each client address to `rate` requests per route.
+
+    Bursts of up to the full count are allowed, after which requests are
+    spread evenly over the period. When Redis cannot be reached requests
+    are let through rather than failed.
+    """
+
+    def __init__(self, rate: str, name: str) -> None:
+        requests, seconds = parse_rate(rate)
+        self.name = name
+        self.interval_ms = max(round(seconds * 1000 / requests), 1)
+        self.tolerance_ms = self.interval_ms * requests
+
+    async def __call__(self, request: Request) -> None:
+        client = request.client
+        await self.hit(request, client.host if client else "unknown")
+
+    async def hit(self, request: Request, identity: str) -> None:
+        """Count a request of `identity` to the current route"""
+        if not Config.RATE_LIMIT_ENABLED:
+            return
+
+        route = request.scope.get("route")
+        path = getattr(route, "path", request.url.path)
+        key = RATE_LIMIT_KEY.format(self.name, request.method, path, identity)
+        try:
+            allowed, retry_after_ms, _ = await rate_limit_hit(
+                key, self.interval_ms, self.tolerance_ms
+            )
+        except RedisError as e:
+            logging.warning("rate limiter unavailable, request allowed: %s", e)
+            return
+
+        if not allowed:
+            raise RateLimited(retry_after=math.ceil(retry_after_ms / 1000))
+
+
+class UserRateLimiter(RateLimiter):
+    """Limit each authenticated user to `rate` requests per route"""
+
+    async def __call__(
+        self, request: Request, token_details: dict = Depends(access_token_bearer)
+    ) -> None:
+        await self.hit(request, token_details["user"]["user_id"])
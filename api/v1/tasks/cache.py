@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+"""Read-through cache for task reads"""
+
+import hashlib
+import json
+import logging
+import uuid
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from redis.exceptions import RedisError
+from sqlmodel.ext.asyncio.session import AsyncSession
+from api.core.cache import TTLCache
+from api.core.config import Config
+from api.db.redis import redis_client
+from .schema import TaskModel, TaskCreate, TaskUpdate
+from .service import TaskService
+from .utils import dump_tasks
+
+
+TASK_KEY = "tasks:item:{}"
+# replaced with a fresh token on every write of the task
+TASK_VERSION_KEY = "tasks:item:{}:version"
+LISTING_VERSION_KEY = "tasks:list:version"
+LISTING_KEY = "tasks:list:{}:{}"
+LISTING_HOLD_KEY = "tasks:list:hold"
+# stored in place of a written task while replicas may still serve the old row
+TASK_HOLD = ""
+
+# KEYS: the task, its version. ARGV: the version read before the task was
+# queried, the serialized task, the TTL. Stores the task only if it was not
+# written since, and never over a hold. Returns 1 when stored.
+FILL_TASK_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+if redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3], 'NX') then
+    return 1
+end
+return 0
+"""
+
+
+def task_key(task_id: Any) -> str:
+    """Canonical form of a task id, as stored in the cache keys.
+
+    Raises ValueError for an id that is not a UUID.
+    """
+    return str(uuid.UUID(str(task_id)))
+
+
+class TaskCache:
+    """Two-tier cache of serialized tasks and listing pages.
+
+    A short-lived in-process LRU sits in front of Redis. Single tasks are
+    stored under their id, only if the task's version is still the one
+    read before it was queried; listing pages are stored under the current
+    listing version, so any write makes every cached page unreachable with
+    one INCR. Entries written by other workers may be served from the local
+    tier for up to TASK_CACHE_LOCAL_TTL seconds. Redis failures are counted
+    and treated as misses.
+
+    With read replicas configured, reads are not cached for
+    TASK_CACHE_REPLICA_LAG seconds after a write, so a lagging replica
+    cannot put the old row back into the cache.
+    """
+
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+        self.local = TTLCache(
+            max_entries=Config.TASK_CACHE_LOCAL_MAX_ENTRIES,
+            ttl=Config.TASK_CACHE_LOCAL_TTL,
+        )
+        self.counters = {"local_hits": 0, "redis_hits": 0, "misses": 0, "errors": 0}
+        self.fill_task_script = redis.register_script(FILL_TASK_SCRIPT)
+
+    async def get_task(self, task_id: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Return a cached task and the task version to store it under on a
+        miss, read together so a write landing during the query is seen
+        by set_task. The version is None when the task must not be stored.
+        """
+        key = TASK_KEY.format(task_id)
+        value = self.local.get(key)
+        if value is not None:
+            self.counters["local_hits"] += 1
+            return value, None
+
+        try:
+            raw, version = await self.redis.mget(key, TASK_VERSION_KEY.format(task_id))
+        except RedisError as e:
+            self._redis_failed(e)
+            return None, None
+        return self._load(key, raw), version or ""
+
+    async def set_task(self, task, version: str) -> None:
+        """Cache a task under the version returned by get_task"""
+        value = TaskModel.model_validate(task, from_attributes=True).model_dump(
+            mode="json"
+        )
+        key = TASK_KEY.format(value["id"])
+        await self._set(
+            key,
+            value,
+            lambda raw: self.fill_task_script(
+                keys=[key, TASK_VERSION_KEY.format(value["id"])],
+                args=[version, raw, Config.TASK_CACHE_TTL],
+            ),
+        )
+
+    async def get_listing(self, params: dict) -> Tuple[Optional[Any], Optional[str]]:
+        """Return a cached listing page and the listing version to store the
+        page under on a miss.
+
+        The version is read before the caller queries, so a write landing
+        in between makes the page unreachable instead of cached. It is
+        None when the page must not be stored.
+        """
+        digest = self._digest(params)
+        local_key = LISTING_KEY.format("local", digest)
+        value = self.local.get(local_key)
+        if value is not None:
+            # served without reading the listing version from Redis
+            self.counters["local_hits"] += 1
+            return value, None
+
+        try:
+            version, hold = await self.redis.mget(
+                LISTING_VERSION_KEY, LISTING_HOLD_KEY
+            )
+        except RedisError as e:
+            self._redis_failed(e)
+            return None, None
+        version = version or "0"
+        value = await self._get(local_key, LISTING_KEY.format(version, digest))
+        return value, None if hold else version
+
+    async def set_listing(self, params: dict, value: Any, version: str) -> None:
+        """Cache a listing page under the version returned by get_listing"""
+        digest = self._digest(params)
+        redis_key = LISTING_KEY.format(version, digest)
+        await self._set(
+            LISTING_KEY.format("local", digest),
+            value,
+            lambda raw: self.redis.set(redis_key, raw, ex=Config.TASK_CACHE_TTL),
+        )
+
+    async def invalidate(self, task_ids: Optional[List[Any]] = None) -> None:
+        """Drop the given tasks and every cached listing page"""
+        ids = []
+        for task_id in task_ids or []:
+            try:
+                ids.append(task_key(task_id))
+            except ValueError:
+                continue
+        hold_ms = int(Config.TASK_CACHE_REPLICA_LAG * 1000)
+        if not Config.DATABASE_REPLICA_URLS:
+            hold_ms = 0
+        self.local.clear()
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for task_id in ids:
+                    # a fill that read the previous version is refused
+                    pipe.set(
+                        TASK_VERSION_KEY.format(task_id),
+                        uuid.uuid4().hex,
+                        ex=Config.TASK_CACHE_TTL,
+                    )
+                    if hold_ms:
+                        pipe.set(TASK_KEY.format(task_id), TASK_HOLD, px=hold_ms)
+                    else:
+                        pipe.delete(TASK_KEY.format(task_id))
+                pipe.incr(LISTING_VERSION_KEY)
+                if hold_ms:
+                    pipe.set(LISTING_HOLD_KEY, 1, px=hold_ms)
+                await pipe.execute()
+        except RedisError as e:
+            self._redis_failed(e)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and local tier size"""
+        return dict(self.counters, local_entries=len(self.local))
+
+    async def _get(self, local_key: str, redis_key: str) -> Optional[Any]:
+        value = self.local.get(local_key)
+        if value is not None:
+            self.counters["local_hits"] += 1
+            return value
+
+        try:
+            raw = await self.redis.get(redis_key)
+        except RedisError as e:
+            self._redis_failed(e)
+            return None
+        return self._load(local_key, raw)
+
+    def _load(self, local_key: str, raw: Optional[str]) -> Optional[Any]:
+        if raw is None or raw == TASK_HOLD:
+            self.counters["misses"] += 1
+            return None
+
+        self.counters["redis_hits"] += 1
+        value = json.loads(raw)
+        self.local.set(local_key, value)
+        return value
+
+    async def _set(
+        self, local_key: str, value: Any, store: Callable[[str], Awaitable]
+    ) -> None:
+        raw = json.dumps(value, separators=(",", ":"))
+        if len(raw) > Config.TASK_CACHE_MAX_ITEM_BYTES:
+            return
+
+        try:
+            stored = await store(raw)
+        except RedisError as e:
+            self._redis_failed(e)
+            return
+        if stored:
+            self.local.set(local_key, value)
+
+    def _digest(self, params: dict) -> str:
+        encoded = json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
+    def _redis_failed(self, error: Exception) -> None:
+        self.counters["errors"] += 1
+        logging.warning("task cache unavailable: %s", error)
+
+
+task_cache = TaskCache()
+
+
+class CachedTaskService(TaskService):
+    """TaskService whose reads go through the task cache"""
+
+    def __init__(self, cache: TaskCache = task_cache):
+        self.cache = cache
+
+    async def get_task(self, task_id: str, session: AsyncSession):
+        """Retrieve a Task by id, cached"""
+        if not Config.TASK_CACHE_ENABLED:
+            return await super().get_task(task_id, session)
+
+        try:
+            cached, version = await self.cache.get_task(task_key(task_id))
+        except ValueError:
+            # not a task id, so no task to cache
+            return await super().get_task(task_id, session)
+        if cached is not None:
+            return cached
+
+        task = await super().get_task(task_id, session)
+        if task is not None and version is not None:
+            await self.cache.set_task(task, version)
+        return task
+
+    async def get_tasks(self, session: AsyncSession, **filters):
+        """Retrieves a list of tasks with pagination and optional filters, cached"""
+        if not Config.TASK_CACHE_ENABLED:
+            return await super().get_tasks(session, **filters)
+
+        params = dict(filters, mode="offset")
+        cached, version = await self.cache.get_listing(params)
+        if cached is not None:
+            return cached
+
+        tasks = await super().get_tasks(session, **filters)
+        if version is not None:
+            await self.cache.set_listing(params, dump_tasks(tasks), version)
+        return tasks
+
+    async def get_tasks_page(
+        self, session: AsyncSession, **filters
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Retrieves a page of tasks after the given cursor, cached"""
+        if not Config.TASK_CACHE_ENABLED:
+            return await super().get_tasks_page(session, **filters)
+
+        params = dict(filters, mode="cursor")
+        cached, version = await self.cache.get_listing(params)
+        if cached is not None:
+            return cached["items"], cached["next_cursor"]
+
+        tasks, next_cursor = await super().get_tasks_page(session, **filters)
+        if version is not None:
+            await self.cache.set_listing(
+                params,
+                {"items": dump_tasks(tasks), "next_cursor": next_cursor},
+                version,
+            )
+        return tasks, next_cursor
+
+    async def create_task(self, task_data: TaskCreate, user_id, session: AsyncSession):
+        """create tasks and invalidate cached listings"""
+        new_task = await super().create_task(task_data, user_id, session)
+        await self.cache.invalidate()
+        return new_task
+
+    async def update_task(
+        self, task_id: str, task_data: TaskUpdate, session: AsyncSession
+    ):
+        """Update a Task by ID and invalidate its cache entries"""
+        task = await super().update_task(task_id, task_data, session)
+        await self.cache.invalidate([task_id])
+        return task
+
+    async def delete_task(self, task_id: str, session: AsyncSession):
+        """Delete a Task by ID and invalidate its cache entries"""
+        deleted = await super().delete_task(task_id, session)
+        await self.cache.invalidate([task_id])
+        return deleted
+
+    async def create_tasks(self, tasks_data, user_id, session: AsyncSession):
+        """Create many tasks and invalidate cached listings"""
+        new_tasks = await super().create_tasks(tasks_data, user_id, session)
+        await self.cache.invalidate()
+        return new_tasks
+
+    async def update_tasks(self, task_ids, task_data: TaskUpdate, session: AsyncSession):
+        """Update many tasks and invalidate their cache entries"""
+        tasks = await super().update_tasks(task_ids, task_data, session)
+        await self.cache.invalidate(task_ids)
+        return tasks
+
+    async def delete_tasks(self, task_ids, session: AsyncSession) -> int:
+        """Delete many tasks and invalidate their cache entries"""
+        deleted = await super().delete_tasks(task_ids, session)
+        await self.cache.invalidate(task_ids)
+        return deleted
+
+    async def import_tasks(self, reader, user_id, session: AsyncSession, **kwargs) -> int:
+        """Import tasks from an upload and invalidate cached listings"""
+        imported = await super().import_tasks(reader, user_id, session, **kwargs)
+        await self.cache.invalidate()
+        return imported
@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Task Model"""
 
-from sqlmodel import Field, Column, String, ARRAY, SQLModel, Index, Relationship
+from sqlmodel import Field, Column, String, SQLModel, Index, Relationship
 import uuid
 from typing import Optional, List
 from pydantic import EmailStr
@@ -14,6 +14,13 @@ class Task(SQLModel, table=True):
     """Task model"""
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tasks_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_tasks_tags", "tags", postgresql_using="gin"),
+    )
 
     id: uuid.UUID = Field(
         sa_column=Column(pg.UUID, primary_key=True, nullable=False, default=uuid.uuid4)
@@ -25,10 +32,10 @@ class Task(SQLModel, table=True):
     due_date: Optional[datetime] = Field(
         sa_column=Column(pg.TIMESTAMP(timezone=True), nullable=True)
     )
-    status: str = Field(sa_column=Column(String, nullable=False, index=True))
-    priority: Optional[str] = Field(sa_column=Column(String, nullable=True, index=True))
+    status: str = Field(sa_column=Column(String, nullable=False))
+    priority: Optional[str] = Field(sa_column=Column(String, nullable=True))
     assigned_to: Optional[EmailStr]
-    tags: Optional[List[str]] = Field(sa_column=Column(ARRAY(String), index=True))
+    tags: Optional[List[str]] = Field(sa_column=Column(pg.ARRAY(String)))
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="users.id")
     user: Optional["models.User"] = Relationship(back_populates="tasks")
 
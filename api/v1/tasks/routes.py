@@ -2,43 +2,105 @@
 """Route file to group task related operations"""
 
 
-from typing import List, Optional
-from fastapi import APIRouter, status, Depends
+from typing import List, Optional, Union, Literal
+from fastapi import APIRouter, status, Depends, Query, UploadFile, File
+from api.core.timing import TimedRoute
 from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
-from api.db.database import get_session
-from api.v1.auth.dependencies import AccessTokenBearer
-from .schema import TaskCreate, TaskUpdate, TaskModel
-from .service import TaskService
+from api.db.database import async_session_maker, read_session
+from api.db.redis import mark_recent_write, wrote_recently
+from api.v1.auth.dependencies import access_token_bearer
+from .schema import (
+    TaskCreate,
+    TaskUpdate,
+    TaskModel,
+    TaskPage,
+    TaskBulkCreate,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    PAGE_MAX_LIMIT,
+)
+from .cache import CachedTaskService
+from .utils import tasks_to_ndjson, tasks_to_csv, csv_header, TaskImportReader
 from .models import Task
 from api.v1.auth.dependencies import RoleChecker
-from api.v1.errors import TaskNotFound
+from api.v1.errors import TaskNotFound, InvalidPagination
+from api.v1.rate_limit import UserRateLimiter
+from api.core.config import Config
 
 
-task_router = APIRouter()
-task_service = TaskService()
-access_token_bearer = AccessTokenBearer()
+task_router = APIRouter(
+    route_class=TimedRoute,
+    dependencies=[Depends(UserRateLimiter(Config.RATE_LIMIT_TASKS, "tasks"))],
+)
+task_service = CachedTaskService()
 role_checker = Depends(RoleChecker(["admin", "user"]))
 
 
+async def get_task_read_session(token_details: dict = Depends(access_token_bearer)):
+    """Read-only session, kept on the primary for DB_REPLICA_LAG seconds
+    after the caller wrote so it reads its own writes"""
+    primary = await wrote_recently(token_details["user"]["user_id"])
+    async with read_session(primary=primary) as session:
+        yield session
+
+
+async def get_task_write_session(token_details: dict = Depends(access_token_bearer)):
+    """Primary session that sends the caller's next reads to the primary
+    once the request succeeds"""
+    async with async_session_maker() as session:
+        yield session
+    await mark_recent_write(token_details["user"]["user_id"])
+
+
 @task_router.get(
     "/",
     status_code=status.HTTP_200_OK,
-    response_model=List[TaskModel],
+    response_model=Union[TaskPage, List[TaskModel]],
     dependencies=[role_checker],
 )
 async def get_all_tasks(
-    skip: int = 0,
-    limit: int = 10,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=PAGE_MAX_LIMIT),
     status: Optional[str] = None,
     priority: Optional[str] = None,
-    tags: Optional[List[str]] = None,
-    session: AsyncSession = Depends(get_session),
+    tags: Optional[List[str]] = Query(None),
+    tags_match: Literal["all", "any"] = "all",
+    paginate: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_task_read_session),
     token_details: dict = Depends(access_token_bearer),
 ):
-    """Retrieve a paginated list of tasks."""
+    """Retrieve a paginated list of tasks.
+
+    Cursor pagination (`paginate=cursor`, then `cursor=<next_cursor>`) is the
+    recommended mode: every page costs the same regardless of depth.
+    `skip`/`limit` is kept for compatibility; `skip` is rejected in cursor
+    mode.
+    """
+    if paginate == "cursor" or cursor is not None:
+        if skip:
+            raise InvalidPagination()
+        tasks, next_cursor = await task_service.get_tasks_page(
+            session,
+            cursor=cursor,
+            limit=limit,
+            status=status,
+            priority=priority,
+            tags=tags,
+            tags_match=tags_match,
+        )
+        return {"items": tasks, "next_cursor": next_cursor}
+
     tasks = await task_service.get_tasks(
-        session, skip=skip, limit=limit, status=status, priority=priority, tags=tags
+        session,
+        skip=skip,
+        limit=limit,
+        status=status,
+        priority=priority,
+        tags=tags,
+        tags_match=tags_match,
     )
     return tasks
 
@@ -46,21 +108,142 @@ async def get_all_tasks(
 @task_router.get(
     "/user/{user_id}",
     status_code=status.HTTP_200_OK,
-    response_model=List[TaskModel],
+    response_model=Union[TaskPage, List[TaskModel]],
     dependencies=[role_checker],
 )
 async def get_user_tasks(
     user_id,
-    skip: int = 0,
-    limit: int = 10,
-    session: AsyncSession = Depends(get_session),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=PAGE_MAX_LIMIT),
+    paginate: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_task_read_session),
     token_details: dict = Depends(access_token_bearer),
 ):
-    """Retrieve a paginated list of tasks."""
+    """Retrieve a paginated list of a user's tasks.
+
+    Supports the same cursor mode as the task listing endpoint.
+    """
+    if paginate == "cursor" or cursor is not None:
+        if skip:
+            raise InvalidPagination()
+        tasks, next_cursor = await task_service.get_user_tasks_page(
+            user_id, session, cursor=cursor, limit=limit
+        )
+        return {"items": tasks, "next_cursor": next_cursor}
+
     tasks = await task_service.get_user_tasks(user_id, session, skip=skip, limit=limit)
     return tasks
 
 
+@task_router.get("/export", status_code=status.HTTP_200_OK, dependencies=[role_checker])
+async def export_tasks(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tags_match: Literal["all", "any"] = "all",
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Stream every matching task as NDJSON or CSV in constant memory."""
+    primary = await wrote_recently(token_details["user"]["user_id"])
+
+    async def export_rows():
+        # the response outlives request dependencies, so the stream owns
+        # its session
+        async with read_session(primary=primary) as session:
+            if export_format == "csv":
+                yield csv_header()
+            async for tasks in task_service.stream_tasks(
+                session,
+                status=status,
+                priority=priority,
+                tags=tags,
+                tags_match=tags_match,
+            ):
+                if export_format == "csv":
+                    yield tasks_to_csv(tasks)
+                else:
+                    yield tasks_to_ndjson(tasks)
+
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_rows(),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="tasks.{export_format}"'
+        },
+    )
+
+
+@task_router.post("/import", status_code=status.HTTP_201_CREATED, dependencies=[role_checker])
+async def import_tasks(
+    file: UploadFile = File(...),
+    import_format: Optional[Literal["ndjson", "csv"]] = Query(None, alias="format"),
+    session: AsyncSession = Depends(get_task_write_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Import tasks from an NDJSON or CSV upload using COPY.
+
+    Rows are validated in chunks; invalid rows are skipped and reported
+    with their row number. The format defaults to the file extension.
+    """
+    if import_format is None:
+        filename = (file.filename or "").lower()
+        import_format = "csv" if filename.endswith(".csv") else "ndjson"
+
+    user_id = token_details.get("user")["user_id"]
+    reader = TaskImportReader(file.file, import_format)
+    imported = await task_service.import_tasks(reader, user_id, session)
+    return {"imported": imported, "failed": reader.failed, "errors": reader.errors}
+
+
+@task_router.post(
+    "/bulk",
+    status_code=status.HTTP_201_CREATED,
+    response_model=List[TaskModel],
+    dependencies=[role_checker],
+)
+async def bulk_create_tasks(
+    task_data: TaskBulkCreate,
+    session: AsyncSession = Depends(get_task_write_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Create many tasks in one request and transaction."""
+    user_id = token_details.get("user")["user_id"]
+    new_tasks = await task_service.create_tasks(task_data.tasks, user_id, session)
+    return new_tasks
+
+
+@task_router.patch(
+    "/bulk",
+    response_model=List[TaskModel],
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def bulk_update_tasks(
+    task_data: TaskBulkUpdate,
+    session: AsyncSession = Depends(get_task_write_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Apply the same changes to many tasks; returns the tasks that matched."""
+    tasks = await task_service.update_tasks(task_data.ids, task_data.changes, session)
+    return tasks
+
+
+@task_router.delete(
+    "/bulk", status_code=status.HTTP_200_OK, dependencies=[role_checker]
+)
+async def bulk_delete_tasks(
+    task_data: TaskBulkDelete,
+    session: AsyncSession = Depends(get_task_write_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    """Delete many tasks by ID; returns how many were deleted."""
+    deleted = await task_service.delete_tasks(task_data.ids, session)
+    return {"deleted": deleted}
+
+
 @task_router.get(
     "/{task_id}",
     status_code=status.HTTP_200_OK,
@@ -69,7 +252,7 @@ async def get_user_tasks(
 )
 async def get_task(
     task_id: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_task_read_session),
     token_details: dict = Depends(access_token_bearer),
 ):
     """Retrieve a task by its ID."""
@@ -88,7 +271,7 @@ async def get_task(
 )
 async def create_tasks(
     task_data: TaskCreate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_task_write_session),
     token_details: dict = Depends(access_token_bearer),
 ) -> dict:
     """Create a new task."""
@@ -106,7 +289,7 @@ async def create_tasks(
 async def update_tasks(
     task_id: str,
     task_data: TaskUpdate,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_task_write_session),
     token_details: dict = Depends(access_token_bearer),
 ):
     """Update an existing task by its ID."""
@@ -122,7 +305,7 @@ async def update_tasks(
 )
 async def delete_tasks(
     task_id: str,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_task_write_session),
     token_details: dict = Depends(access_token_bearer),
 ):
     """Delete a task by its ID."""
@@ -1,12 +1,16 @@
 #!/usr/bin/python3
 """Task Schema Module"""
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 import uuid
 
 
+BULK_MAX_ITEMS = 10000
+PAGE_MAX_LIMIT = 1000
+
+
 class TaskModel(BaseModel):
     id: uuid.UUID
     title: str
@@ -39,3 +43,21 @@ class TaskUpdate(BaseModel):
     priority: Optional[str] = None
     assigned_to: Optional[str] = None
     tags: Optional[List[str]] = None
+
+
+class TaskPage(BaseModel):
+    items: List[TaskModel]
+    next_cursor: Optional[str] = None
+
+
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TaskBulkUpdate(BaseModel):
+    ids: List[uuid.UUID] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
+    changes: TaskUpdate
+
+
+class TaskBulkDelete(BaseModel):
+    ids: List[uuid.UUID] = Field(min_length=1, max_length=BULK_MAX_ITEMS)
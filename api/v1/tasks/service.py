@@ -2,10 +2,35 @@
 """Service Module for Task"""
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select, desc
-from typing import Optional, List
-from sqlalchemy import or_
+from typing import Optional, List, Tuple
+from datetime import datetime
+import uuid
+from sqlalchemy import or_, tuple_, any_, bindparam, insert, update, delete
+import sqlalchemy.dialects.postgresql as pg
+from starlette.concurrency import run_in_threadpool
 from .schema import TaskCreate, TaskUpdate
 from .models import Task
+from .utils import encode_cursor, decode_cursor, TaskImportReader
+
+
+IMPORT_COLUMNS = [
+    "id",
+    "created_at",
+    "updated_at",
+    "title",
+    "description",
+    "due_date",
+    "status",
+    "priority",
+    "assigned_to",
+    "tags",
+    "user_id",
+]
+
+
+def _ids_param(task_ids: List[uuid.UUID]):
+    """Bind a list of ids as a single uuid[] parameter for `= ANY(...)`"""
+    return any_(bindparam("task_ids", task_ids, type_=pg.ARRAY(pg.UUID)))
 
 
 class TaskService:
@@ -19,22 +44,53 @@ class TaskService:
         status: Optional[str] = None,
         priority: Optional[str] = None,
         tags: Optional[List[str]] = None,
+        tags_match: str = "all",
     ):
         """Retrieves a list of tasks with pagination and optional filters"""
 
         statement = (
             select(Task).offset(skip).limit(limit).order_by(desc(Task.created_at))
         )
-        if status:
-            statement = statement.where(Task.status == status)
-        if priority:
-            statement = statement.where(Task.priority == priority)
-        if tags:
-            statement = statement.where(Task.tags.contains(*tags))
+        statement = self._filter(statement, status, priority, tags, tags_match)
 
         result = await session.exec(statement)
         return result.all()
 
+    async def get_tasks_page(
+        self,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tags_match: str = "all",
+    ) -> Tuple[List[Task], Optional[str]]:
+        """Retrieves a page of tasks after the given cursor with optional filters"""
+
+        statement = self._filter(select(Task), status, priority, tags, tags_match)
+
+        return await self._paginate(statement, session, cursor, limit)
+
+    async def stream_tasks(
+        self,
+        session: AsyncSession,
+        batch_size: int = 1000,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tags_match: str = "all",
+    ):
+        """Yield batches of tasks from a server-side cursor, newest first"""
+        statement = self._filter(select(Task), status, priority, tags, tags_match)
+        statement = statement.order_by(desc(Task.created_at), desc(Task.id))
+
+        result = await session.stream_scalars(
+            statement.execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
     async def get_user_tasks(
         self, user_id, session: AsyncSession, skip: int = 0, limit: int = 10
     ):
@@ -49,6 +105,69 @@ class TaskService:
         result = await session.exec(statement)
         return result.all()
 
+    async def get_user_tasks_page(
+        self,
+        user_id,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 10,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """Retrieves a page of a user's tasks after the given cursor"""
+        statement = select(Task).where(Task.user_id == user_id)
+
+        return await self._paginate(statement, session, cursor, limit)
+
+    def _filter(
+        self,
+        statement,
+        status: Optional[str],
+        priority: Optional[str],
+        tags: Optional[List[str]],
+        tags_match: str,
+    ):
+        """Apply the listing filters to a task select.
+
+        Tags use the array operators `@>` (all) and `&&` (any), which are
+        served by the GIN index on tasks.tags.
+        """
+        if status:
+            statement = statement.where(Task.status == status)
+        if priority:
+            statement = statement.where(Task.priority == priority)
+        if tags:
+            if tags_match == "any":
+                statement = statement.where(Task.tags.overlap(tags))
+            else:
+                statement = statement.where(Task.tags.contains(tags))
+        return statement
+
+    async def _paginate(
+        self, statement, session: AsyncSession, cursor: Optional[str], limit: int
+    ) -> Tuple[List[Task], Optional[str]]:
+        """Apply keyset pagination on (created_at, id) to a task select.
+
+        One extra row is fetched to know whether another page exists, so
+        the cost of a page does not depend on how deep it is.
+        """
+        if cursor:
+            created_at, task_id = decode_cursor(cursor)
+            statement = statement.where(
+                tuple_(Task.created_at, Task.id) < tuple_(created_at, task_id)
+            )
+        statement = statement.order_by(desc(Task.created_at), desc(Task.id)).limit(
+            limit + 1
+        )
+
+        result = await session.exec(statement)
+        tasks = result.all()
+
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1].created_at, tasks[-1].id)
+
+        return tasks, next_cursor
+
     async def get_task(self, task_id: str, session: AsyncSession):
         """Retrieve a Task by id"""
         statement = select(Task).where(Task.id == task_id)
@@ -69,27 +188,139 @@ class TaskService:
     async def update_task(
         self, task_id: str, task_data: TaskUpdate, session: AsyncSession
     ):
-        """Update a Task by ID"""
+        """Update a Task by ID with a single UPDATE ... RETURNING"""
+
+        update_task_dict = task_data.dict(exclude_unset=True)
+        if not update_task_dict:
+            return await self.get_task(task_id, session)
 
-        task_to_update = await self.get_task(task_id, session)
+        statement = (
+            update(Task)
+            .where(Task.id == task_id)
+            .values(**update_task_dict)
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.exec(statement)
+        task = result.scalars().first()
+        await session.commit()
 
-        if task_to_update is not None:
-            update_task_dict = task_data.dict(exclude_unset=True)
-            for key, value in update_task_dict.items():
-                setattr(task_to_update, key, value)
-            await session.commit()
-            await session.refresh(task_to_update)
-            return task_to_update
-        else:
-            return None
+        return task
 
     async def delete_task(self, task_id: str, session: AsyncSession):
-        """Delete a Task by ID"""
-        task_to_delete = await self.get_task(task_id, session)
-
-        if task_to_delete is not None:
-            await session.delete(task_to_delete)
-            await session.commit()
-            return True
-        else:
-            return False
+        """Delete a Task by ID with a single DELETE ... RETURNING id"""
+        statement = (
+            delete(Task)
+            .where(Task.id == task_id)
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.exec(statement)
+        deleted = result.first() is not None
+        await session.commit()
+
+        return deleted
+
+    async def create_tasks(
+        self, tasks_data: List[TaskCreate], user_id, session: AsyncSession
+    ) -> List[Task]:
+        """Create many tasks with multi-row INSERT ... RETURNING in one
+        transaction; the tasks come back in the order they were given"""
+        rows = [dict(task_data, user_id=user_id) for task_data in tasks_data]
+        statement = insert(Task).returning(Task, sort_by_parameter_order=True)
+        result = await session.exec(statement, params=rows)
+        new_tasks = result.scalars().all()
+        await session.commit()
+        return new_tasks
+
+    async def update_tasks(
+        self, task_ids: List[uuid.UUID], task_data: TaskUpdate, session: AsyncSession
+    ) -> List[Task]:
+        """Apply the same changes to many tasks with one UPDATE ... RETURNING"""
+        update_task_dict = task_data.dict(exclude_unset=True)
+        if not update_task_dict:
+            statement = select(Task).where(Task.id == _ids_param(task_ids))
+            result = await session.exec(statement)
+            return result.all()
+
+        statement = (
+            update(Task)
+            .where(Task.id == _ids_param(task_ids))
+            .values(**update_task_dict)
+            .returning(Task)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.exec(statement)
+        updated_tasks = result.scalars().all()
+        await session.commit()
+        return updated_tasks
+
+    async def delete_tasks(
+        self, task_ids: List[uuid.UUID], session: AsyncSession
+    ) -> int:
+        """Delete many tasks in a single DELETE and transaction"""
+        statement = (
+            delete(Task)
+            .where(Task.id == _ids_param(task_ids))
+            .returning(Task.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.exec(statement)
+        deleted = len(result.all())
+        await session.commit()
+        return deleted
+
+    async def copy_tasks(
+        self, tasks_data: List[TaskCreate], user_id, session: AsyncSession
+    ) -> int:
+        """Load tasks with COPY, inside the session's transaction.
+
+        Much faster than INSERT for large batches; the caller commits.
+        """
+        now = datetime.now()
+        user_id = uuid.UUID(str(user_id)) if user_id is not None else None
+        records = [
+            (
+                uuid.uuid4(),
+                now,
+                now,
+                task.title,
+                task.description,
+                task.due_date,
+                task.status,
+                task.priority,
+                task.assigned_to,
+                task.tags,
+                user_id,
+            )
+            for task in tasks_data
+        ]
+
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            Task.__tablename__, records=records, columns=IMPORT_COLUMNS
+        )
+        return len(records)
+
+    async def import_tasks(
+        self,
+        reader: TaskImportReader,
+        user_id,
+        session: AsyncSession,
+        chunk_size: int = 5000,
+    ) -> int:
+        """Validate and COPY an upload chunk by chunk in one transaction.
+
+        Parsing runs in a worker thread so the event loop is never blocked
+        by a large file. Returns the number of imported tasks.
+        """
+        imported = 0
+        while True:
+            tasks = await run_in_threadpool(reader.read_chunk, chunk_size)
+            if not tasks:
+                break
+            imported += await self.copy_tasks(tasks, user_id, session)
+
+        await session.commit()
+        return imported
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""Task helper Module"""
+
+import base64
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import IO, Iterable, List, Tuple
+from pydantic import TypeAdapter, ValidationError
+from api.v1.errors import InvalidCursor, InvalidImportFile
+from .schema import TaskModel, TaskCreate
+
+
+EXPORT_FIELDS = list(TaskModel.model_fields)
+
+# an empty CSV cell in these columns is read back as null
+NULLABLE_IMPORT_FIELDS = {"due_date", "priority", "assigned_to", "tags"}
+
+task_list_adapter = TypeAdapter(List[TaskModel])
+
+
+def encode_cursor(created_at: datetime, task_id: uuid.UUID) -> str:
+    """Encode the position of a task into an opaque pagination cursor"""
+    payload = json.dumps(
+        [created_at.isoformat(), str(task_id)], separators=(",", ":")
+    ).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a pagination cursor into a (created_at, id) pair"""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        if not isinstance(created_at, str) or not isinstance(task_id, str):
+            raise InvalidCursor()
+        return datetime.fromisoformat(created_at), uuid.UUID(task_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+def dump_tasks(tasks: Iterable) -> list:
+    """Serialize tasks (ORM objects or dicts) to JSON-compatible dicts"""
+    return task_list_adapter.dump_python(
+        task_list_adapter.validate_python(list(tasks), from_attributes=True),
+        mode="json",
+    )
+
+
+def tasks_to_ndjson(tasks: Iterable) -> str:
+    """Render tasks as newline delimited JSON"""
+    return "".join(
+        json.dumps(task, separators=(",", ":")) + "\n" for task in dump_tasks(tasks)
+    )
+
+
+def csv_header() -> str:
+    """Render the CSV header row of a task export"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_FIELDS)
+    return buffer.getvalue()
+
+
+def tasks_to_csv(tasks: Iterable) -> str:
+    """Render tasks as CSV rows; tags are written as a JSON array"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for task in dump_tasks(tasks):
+        if task["tags"] is not None:
+            task["tags"] = json.dumps(task["tags"])
+        writer.writerow(
+            "" if task[field] is None else task[field] for field in EXPORT_FIELDS
+        )
+    return buffer.getvalue()
+
+
+class TaskImportReader:
+    """Read TaskCreate rows from an NDJSON or CSV upload in chunks.
+
+    Rows are validated as they are read, so only one chunk is held in
+    memory. Invalid rows are counted and the first `max_errors` of them
+    are kept with their row number and validation errors. A file that is
+    not UTF-8 or not parseable as CSV raises InvalidImportFile.
+    """
+
+    def __init__(self, file: IO[bytes], import_format: str, max_errors: int = 100):
+        # lines are split on b"\n" and decoded one at a time, which works on
+        # any binary file object (TextIOWrapper needs 3.11 for an upload's
+        # SpooledTemporaryFile)
+        lines = (line.decode("utf-8") for line in file)
+        if import_format == "csv":
+            self.rows = enumerate(csv.DictReader(lines), start=1)
+        else:
+            self.rows = enumerate(lines, start=1)
+        self.import_format = import_format
+        self.max_errors = max_errors
+        self.failed = 0
+        self.errors = []
+
+    def read_chunk(self, size: int) -> List[TaskCreate]:
+        """Return up to `size` valid rows; an empty list means the file is done"""
+        tasks = []
+        while True:
+            try:
+                row_number, row = next(self.rows)
+            except StopIteration:
+                break
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise InvalidImportFile() from e
+            try:
+                data = self._parse(row)
+                if data is None:
+                    continue
+                tasks.append(TaskCreate.model_validate(data))
+            except (ValueError, ValidationError) as e:
+                self._reject(row_number, e)
+            if len(tasks) >= size:
+                break
+        return tasks
+
+    def _parse(self, row):
+        if self.import_format == "csv":
+            data = {
+                key: None if value == "" and key in NULLABLE_IMPORT_FIELDS else value
+                for key, value in row.items()
+            }
+            if data.get("tags") is not None:
+                data["tags"] = json.loads(data["tags"])
+            return data
+
+        row = row.strip()
+        return json.loads(row) if row else None
+
+    def _reject(self, row_number: int, error: Exception) -> None:
+        self.failed += 1
+        if len(self.errors) >= self.max_errors:
+            return
+        if isinstance(error, ValidationError):
+            detail = error.errors(include_url=False, include_context=False)
+        else:
+            detail = [{"msg": str(error)}]
+        self.errors.append({"row": row_number, "errors": detail})
@@ -4,10 +4,19 @@
 Test configuration file for pytest
 """
 
+import asyncio
+import threading
+from pathlib import Path
+from fastapi_mail import ConnectionConfig, FastMail
 from api.db.database import get_session
-from api.v1.auth.dependencies import RefreshTokenBearer, AccessTokenBearer, RoleChecker
+from api.v1.auth.dependencies import (
+    refresh_token_bearer,
+    access_token_bearer,
+    RoleChecker,
+)
 from unittest.mock import Mock
 from api import app
+from api.v1.tasks.routes import get_task_read_session, get_task_write_session
 import pytest
 from fastapi.testclient import TestClient
 
@@ -22,11 +31,11 @@ def get_mock_session():
     yield mock_session
 
 
-access_token_bearer = AccessTokenBearer()
-refresh_token_bearer = RefreshTokenBearer()
 role_checker = RoleChecker(["admin", "user"])
 
 app.dependency_overrides[get_session] = get_mock_session
+app.dependency_overrides[get_task_read_session] = get_mock_session
+app.dependency_overrides[get_task_write_session] = get_mock_session
 app.dependency_overrides[refresh_token_bearer] = Mock()
 app.dependency_overrides[access_token_bearer] = Mock()
 app.dependency_overrides[role_checker] = Mock()
@@ -50,3 +59,95 @@ def fake_task_service():
 @pytest.fixture
 def test_client():
     return TestClient(app)
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory Redis that also runs Lua scripts (needs fakeredis[lua])"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+class LocalSMTPServer:
+    """Minimal SMTP server on localhost that records delivered messages"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.host = "127.0.0.1"
+        self.port = None
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 localhost ESMTP\r\n")
+        sender, recipients = None, []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            verb = line[:4].upper()
+            if verb == b"EHLO":
+                writer.write(b"250-localhost\r\n250 AUTH PLAIN\r\n")
+            elif verb == b"AUTH":
+                writer.write(b"235 Authentication successful\r\n")
+            elif verb == b"MAIL":
+                sender, recipients = line[10:].strip(), []
+                writer.write(b"250 OK\r\n")
+            elif verb == b"RCPT":
+                recipients.append(line[8:].strip().strip(b"<>").decode())
+                writer.write(b"250 OK\r\n")
+            elif verb == b"DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                data = await reader.readuntil(b"\r\n.\r\n")
+                self.messages.append({"recipients": recipients, "data": data})
+                writer.write(b"250 OK\r\n")
+            elif verb == b"QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+@pytest.fixture
+def smtp_server():
+    """A local SMTP stand-in running on its own event loop thread"""
+    server = LocalSMTPServer()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def start():
+        return await asyncio.start_server(server.handle, server.host, 0)
+
+    listener = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    server.port = listener.sockets[0].getsockname()[1]
+    yield server
+
+    listener.close()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def smtp_mail(smtp_server, tmp_path: Path):
+    """FastMail configured to deliver to the local SMTP stand-in"""
+    return FastMail(
+        ConnectionConfig(
+            MAIL_USERNAME="user",
+            MAIL_PASSWORD="password",
+            MAIL_FROM="noreply@example.com",
+            MAIL_PORT=smtp_server.port,
+            MAIL_SERVER=smtp_server.host,
+            MAIL_STARTTLS=False,
+            MAIL_SSL_TLS=False,
+            USE_CREDENTIALS=True,
+            VALIDATE_CERTS=False,
+            TEMPLATE_FOLDER=tmp_path,
+        )
+    )
@@ -1,7 +1,19 @@
 #!/usr/bin/python3
 """Test authentication module"""
 
-from api.v1.auth.schema import UserCreate
+import asyncio
+import json
+import threading
+import time
+import uuid
+from unittest.mock import AsyncMock, Mock
+from starlette.requests import Request
+from api.v1.auth import dependencies
+from api.v1.auth.cache import PRINCIPAL_CHANNEL, PrincipalCache
+from api.v1.auth.schema import UserCreate, UserPrincipal
+from api.v1.auth.service import UserService
+from api.v1.auth.utils import create_access_token, PasswordHasher
+from api.v1.errors import ServiceBusy
 
 
 auth_prefix = f"/api/v1/auth"
@@ -25,3 +37,180 @@ def test_user_creation(fake_session, fake_user_service, test_client):
     )
     assert fake_user_service.create_user_called_once()
     assert fake_user_service.create_user_called_once_with(user_data, fake_session)
+
+
+def test_get_principal_skips_tasks():
+    """Test the principal lookup only selects user columns"""
+    session = Mock()
+    session.exec = AsyncMock(return_value=Mock(first=Mock(return_value=None)))
+
+    principal = asyncio.run(UserService().get_principal("a@b.com", session))
+
+    statement = str(session.exec.call_args[0][0])
+    assert principal is None
+    assert "tasks" not in statement
+    assert "password" not in statement
+
+
+def test_token_checked_once_per_request(monkeypatch):
+    """Test the token is decoded and checked against the blocklist once"""
+    token = create_access_token(user_data={"email": "a@b.com", "user_id": "1"})
+    request = Request(
+        {
+            "type": "http",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+    )
+    blocklist = AsyncMock(return_value=False)
+    monkeypatch.setattr(dependencies, "token_in_blocklist", blocklist)
+
+    async def resolve_twice():
+        first = await dependencies.access_token_bearer(request)
+        second = await dependencies.AccessTokenBearer()(request)
+        return first, second
+
+    first, second = asyncio.run(resolve_twice())
+
+    assert first == second
+    blocklist.assert_awaited_once()
+
+
+def test_password_hasher_backpressure(monkeypatch):
+    """Test the hashing pool rejects work beyond its pending limit"""
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    monkeypatch.setattr(
+        "api.v1.auth.utils.generate_password_hash",
+        lambda password: time.sleep(0.05) or f"hashed-{password}",
+    )
+
+    async def hash_concurrently():
+        return await asyncio.gather(
+            hasher.hash("first"), hasher.hash("second"), return_exceptions=True
+        )
+
+    first, second = asyncio.run(hash_concurrently())
+
+    assert first == "hashed-first"
+    assert isinstance(second, ServiceBusy)
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["completed"] == 1
+
+
+def test_principal_cache_evicts_by_id():
+    """Test evicting by user id drops the email entry too"""
+    cache = PrincipalCache(redis=Mock())
+    cache.active = True
+    principal = UserPrincipal(
+        id=uuid.uuid4(),
+        username="nadduli",
+        email="a@b.com",
+        role="user",
+        isVerified=True,
+    )
+    cache.set(principal, cache.generation)
+
+    cache.evict(user_id=principal.id)
+
+    assert cache.get("a@b.com") is None
+
+
+def test_principal_cache_inactive_without_listener():
+    """Test nothing is served while invalidations cannot be received"""
+    cache = PrincipalCache(redis=Mock())
+    principal = UserPrincipal(
+        id=uuid.uuid4(),
+        username="nadduli",
+        email="a@b.com",
+        role="user",
+        isVerified=True,
+    )
+
+    cache.set(principal, cache.generation)
+
+    assert cache.get("a@b.com") is None
+
+
+def test_principal_cache_skips_load_raced_by_invalidation():
+    """Test a principal loaded before an invalidation is not cached"""
+    cache = PrincipalCache(redis=Mock())
+    cache.active = True
+    principal = UserPrincipal(
+        id=uuid.uuid4(),
+        username="nadduli",
+        email="a@b.com",
+        role="user",
+        isVerified=True,
+    )
+
+    generation = cache.generation
+    # the role changes while the principal is being read from the database
+    cache.evict("a@b.com", principal.id)
+    cache.set(principal, generation)
+
+    assert cache.get("a@b.com") is None
+
+
+def test_principal_cache_listener_survives_malformed_message(fake_redis):
+    """Test a garbage invalidation does not stop the listener"""
+    cache = PrincipalCache(redis=fake_redis)
+    principal = UserPrincipal(
+        id=uuid.uuid4(),
+        username="nadduli",
+        email="a@b.com",
+        role="user",
+        isVerified=True,
+    )
+
+    async def invalidate_after_garbage():
+        listener = asyncio.ensure_future(cache.listen())
+        while not cache.active:
+            await asyncio.sleep(0.01)
+        for message in ("not json", "[1]", json.dumps({"email": "a@b.com"})):
+            await fake_redis.publish(PRINCIPAL_CHANNEL, message)
+        await asyncio.sleep(0.1)
+        cache.set(principal, cache.generation)
+        cached = cache.get("a@b.com")
+        await fake_redis.publish(
+            PRINCIPAL_CHANNEL,
+            json.dumps({"email": "a@b.com", "id": str(principal.id)}),
+        )
+        await asyncio.sleep(0.1)
+        evicted = cache.active and cache.get("a@b.com") is None
+        listener.cancel()
+        await asyncio.gather(listener, return_exceptions=True)
+        return cached, evicted
+
+    cached, evicted = asyncio.run(invalidate_after_garbage())
+
+    assert cached == principal
+    assert evicted
+
+
+def test_password_hasher_counts_work_until_thread_finishes(monkeypatch):
+    """Test cancelled requests keep their slot and failures are not completed"""
+    hasher = PasswordHasher(max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    def slow_hash(password):
+        release.wait(5)
+        raise ValueError("bcrypt failed")
+
+    monkeypatch.setattr("api.v1.auth.utils.generate_password_hash", slow_hash)
+
+    async def cancel_running_hash():
+        task = asyncio.ensure_future(hasher.hash("first"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # bcrypt still runs for the cancelled request
+        running = hasher.stats()["running"]
+        release.set()
+        while hasher.stats()["running"]:
+            await asyncio.sleep(0.01)
+        return running
+
+    running = asyncio.run(cancel_running_hash())
+
+    assert running == 1
+    assert hasher.stats()["failed"] == 1
+    assert hasher.stats()["completed"] == 0
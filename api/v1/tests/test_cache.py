@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""test Cache Module"""
+
+import asyncio
+import uuid
+from datetime import datetime
+from unittest.mock import Mock
+from api.core.cache import TTLCache
+from api.core.config import Config
+from api.v1.tasks.cache import CachedTaskService, TaskCache
+from api.v1.tasks.models import Task
+
+
+def make_task() -> Task:
+    return Task(
+        id=uuid.uuid4(),
+        title="test title",
+        description="test description",
+        status="todo",
+        created_at=datetime.now(),
+        updated_at=datetime.now(),
+    )
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    """Test the cache stays within max_entries"""
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    """Test entries are dropped once their ttl has passed"""
+    cache = TTLCache(max_entries=2, ttl=60)
+
+    cache.set("a", 1, ttl=0)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_task_cache_read_through(fake_redis):
+    """Test a cached task is served from the local tier, then from Redis"""
+    cache = TaskCache(redis=fake_redis)
+    task = make_task()
+
+    async def read_twice():
+        cached, version = await cache.get_task(str(task.id))
+        assert cached is None
+        await cache.set_task(task, version)
+        local, _ = await cache.get_task(str(task.id))
+        cache.local.clear()
+        remote, _ = await cache.get_task(str(task.id))
+        return local, remote
+
+    local, remote = asyncio.run(read_twice())
+
+    assert local == remote
+    assert local["title"] == "test title"
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["local_hits"] == 1
+    assert cache.stats()["redis_hits"] == 1
+
+
+def test_listing_written_during_query_not_cached(fake_redis):
+    """Test a page queried before a write is stored under the old version"""
+    cache = TaskCache(redis=fake_redis)
+    params = {"skip": 0, "limit": 10}
+
+    async def read_around_write():
+        _, version = await cache.get_listing(params)
+        # a write lands while the page is being queried
+        await cache.invalidate()
+        await cache.set_listing(params, [{"title": "stale"}], version)
+        cache.local.clear()
+        return await cache.get_listing(params)
+
+    cached, version = asyncio.run(read_around_write())
+
+    assert cached is None
+    assert version == "1"
+
+
+def test_reads_not_cached_right_after_write(monkeypatch, fake_redis):
+    """Test a replica read just after a write does not fill the cache"""
+    monkeypatch.setattr(Config, "DATABASE_REPLICA_URLS", ["postgresql://replica"])
+    cache = TaskCache(redis=fake_redis)
+    task = make_task()
+
+    async def read_after_write():
+        await cache.invalidate([task.id])
+        _, task_version = await cache.get_task(str(task.id))
+        await cache.set_task(task, task_version)
+        _, version = await cache.get_listing({"skip": 0})
+        cached, _ = await cache.get_task(str(task.id))
+        return cached, version
+
+    cached, version = asyncio.run(read_after_write())
+
+    assert cached is None
+    assert version is None
+
+
+def test_task_written_during_query_not_cached(fake_redis):
+    """Test a task read before a write is not stored over the new row"""
+    cache = TaskCache(redis=fake_redis)
+    task = make_task()
+
+    async def read_around_write():
+        _, version = await cache.get_task(str(task.id))
+        # the task is updated and invalidated while the old row is in flight
+        await cache.invalidate([task.id])
+        await cache.set_task(task, version)
+        cache.local.clear()
+        stale, _ = await cache.get_task(str(task.id))
+        _, version = await cache.get_task(str(task.id))
+        await cache.set_task(task, version)
+        cache.local.clear()
+        fresh, _ = await cache.get_task(str(task.id))
+        return stale, fresh
+
+    stale, fresh = asyncio.run(read_around_write())
+
+    assert stale is None
+    assert fresh["id"] == str(task.id)
+
+
+def test_task_id_normalised(fake_redis):
+    """Test a non-canonical id reads the same cache entry"""
+    cache = TaskCache(redis=fake_redis)
+    service = CachedTaskService(cache=cache)
+    task = make_task()
+
+    async def read_upper_case():
+        _, version = await cache.get_task(str(task.id))
+        await cache.set_task(task, version)
+        cache.local.clear()
+        return await service.get_task(str(task.id).upper(), Mock())
+
+    cached = asyncio.run(read_upper_case())
+
+    assert cached["id"] == str(task.id)
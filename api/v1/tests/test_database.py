@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+"""test Database Module"""
+
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from functools import partial
+from time import time
+from unittest.mock import AsyncMock, Mock
+from api.core.config import Config
+from api.db import database, redis as blocklist
+from api.db.database import ReplicaRouter
+from api.db.redis import RevokedTokens
+from api.v1.tasks import routes as task_routes
+
+
+def test_replica_round_robin():
+    """Test reads rotate across replicas"""
+    router = ReplicaRouter(["replica-a", "replica-b"], retry_after=30)
+
+    first = [maker for _, maker in router.candidates()]
+    second = [maker for _, maker in router.candidates()]
+
+    assert first == ["replica-a", "replica-b"]
+    assert second == ["replica-b", "replica-a"]
+
+
+def test_failed_replica_skipped():
+    """Test a failed replica leaves the rotation"""
+    router = ReplicaRouter(["replica-a", "replica-b"], retry_after=30)
+
+    router.mark_failed(0)
+
+    assert [maker for _, maker in router.candidates()] == ["replica-b"]
+    assert [maker for _, maker in router.candidates()] == ["replica-b"]
+
+
+class FakeSession:
+    """Session stand-in that records which database it belongs to"""
+
+    def __init__(self, name):
+        self.name = name
+
+    async def connection(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+
+def test_reads_follow_own_writes_to_primary(monkeypatch, fake_redis):
+    """Test a user's reads go to the primary for a while after it writes"""
+    monkeypatch.setattr(Config, "DATABASE_REPLICA_URLS", ["postgresql://replica"])
+    monkeypatch.setattr(blocklist, "redis_client", fake_redis)
+    monkeypatch.setattr(
+        database, "replica_router", ReplicaRouter([partial(FakeSession, "replica")], 30)
+    )
+    primary = partial(FakeSession, "primary")
+    monkeypatch.setattr(database, "async_session_maker", primary)
+    monkeypatch.setattr(task_routes, "async_session_maker", primary)
+    read_session = asynccontextmanager(task_routes.get_task_read_session)
+    write_session = asynccontextmanager(task_routes.get_task_write_session)
+    writer, other = {"user": {"user_id": "writer"}}, {"user": {"user_id": "other"}}
+
+    async def write_then_read():
+        reads = []
+        async with read_session(writer) as session:
+            reads.append(session.name)
+        async with write_session(writer) as session:
+            reads.append(session.name)
+        for token_details in (writer, other):
+            async with read_session(token_details) as session:
+                reads.append(session.name)
+        return reads, await fake_redis.pttl("db:recent-write:writer")
+
+    reads, window = asyncio.run(write_then_read())
+
+    assert reads == ["replica", "primary", "primary", "replica"]
+    assert 0 < window <= Config.DB_REPLICA_LAG * 1000
+
+
+def test_blocklist_answered_locally(monkeypatch):
+    """Test a synced worker skips Redis for tokens that are not revoked"""
+    redis = Mock(get=AsyncMock(return_value=""))
+    monkeypatch.setattr(blocklist, "token_blocklist", redis)
+    monkeypatch.setattr(blocklist, "revoked_tokens", RevokedTokens(redis=redis))
+    blocklist.revoked_tokens.synced = True
+    blocklist.revoked_tokens.add("revoked-jti", time() + 60)
+
+    assert asyncio.run(blocklist.token_in_blocklist("valid-jti")) is False
+    redis.get.assert_not_awaited()
+    assert asyncio.run(blocklist.token_in_blocklist("revoked-jti")) is True
+    redis.get.assert_awaited_once_with("revoked-jti")
+
+
+def test_blocklist_falls_back_to_redis_until_synced(monkeypatch):
+    """Test an unsynced worker asks Redis"""
+    redis = Mock(get=AsyncMock(return_value=None))
+    monkeypatch.setattr(blocklist, "token_blocklist", redis)
+    monkeypatch.setattr(blocklist, "revoked_tokens", RevokedTokens(redis=redis))
+
+    assert asyncio.run(blocklist.token_in_blocklist("valid-jti")) is False
+    redis.get.assert_awaited_once_with("valid-jti")
+
+
+def test_tokens_checked_in_one_round_trip(monkeypatch):
+    """Test several jtis are checked with a single MGET"""
+    redis = Mock(mget=AsyncMock(return_value=["", None]))
+    monkeypatch.setattr(blocklist, "token_blocklist", redis)
+    monkeypatch.setattr(blocklist, "revoked_tokens", RevokedTokens(redis=redis))
+
+    result = asyncio.run(blocklist.tokens_in_blocklist(["revoked-jti", "valid-jti"]))
+
+    assert result == {"revoked-jti": True, "valid-jti": False}
+    redis.mget.assert_awaited_once_with(["revoked-jti", "valid-jti"])
+
+
+def test_logout_all_revokes_refresh_token_issued_hours_ago(monkeypatch, fake_redis):
+    """Test a refresh token is revoked, and stays revoked, past ten hours"""
+    monkeypatch.setattr(blocklist, "token_blocklist", fake_redis)
+    monkeypatch.setattr(blocklist, "revoked_tokens", RevokedTokens(redis=fake_redis))
+    monkeypatch.setattr(
+        blocklist,
+        "revoke_user_tokens_script",
+        fake_redis.register_script(blocklist.REVOKE_USER_TOKENS_SCRIPT),
+    )
+    issued_at = time() - 11 * 3600
+    refresh_expires_at = issued_at + 2 * 86400
+    key = blocklist.USER_TOKENS_KEY.format("user-1")
+
+    async def logout_all():
+        await blocklist.record_user_jtis(
+            "user-1", {"access-jti": issued_at + 3600, "refresh-jti": refresh_expires_at}
+        )
+        # the recorded tokens as they stand eleven hours after login
+        await fake_redis.expire(key, blocklist.JTI_EXPIRY - 11 * 3600)
+        revoked = await blocklist.revoke_user_tokens("user-1")
+        return revoked, await fake_redis.ttl("refresh-jti")
+
+    revoked, ttl = asyncio.run(logout_all())
+
+    assert revoked == 1
+    assert abs(ttl - (refresh_expires_at - time())) < 5
+    assert blocklist.revoked_tokens.contains("refresh-jti")
+    assert not blocklist.revoked_tokens.contains("access-jti")
+
+
+def test_blocklist_backfill_indexes_old_revocations(fake_redis):
+    """Test revocations stored only as plain keys are indexed before any
+    worker trusts its local copy"""
+    revoked_jti = str(uuid.uuid4())
+    revoked = RevokedTokens(redis=fake_redis)
+
+    async def backfill():
+        await fake_redis.set(revoked_jti, "", ex=600)
+        await fake_redis.set(str(uuid.uuid4()), "not a revocation", ex=600)
+        await revoked.sync()
+        before = revoked.indexed
+        added = await blocklist.backfill_blocklist_index(fake_redis)
+        await revoked.sync()
+        return before, added
+
+    before, added = asyncio.run(backfill())
+
+    assert before is False
+    assert added == 1
+    assert revoked.indexed is True
+    assert revoked.contains(revoked_jti)
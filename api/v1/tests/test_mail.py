@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+"""Mail dispatch tests"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, Mock
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from api import app
+from api.v1 import celery_tasks, mail_dispatch
+from api.v1.auth import routes as auth_routes
+from api.v1.auth.schema import MAIL_MAX_RECIPIENTS
+from api.v1.errors import register_all_errors
+from api.v1.mail import (
+    SMTPPool,
+    mail_templates,
+    MAIL_OUTBOX_KEY,
+    MAIL_PROCESSING_KEY,
+    MAIL_LEASES_KEY,
+    MAIL_DEAD_LETTER_KEY,
+)
+
+
+auth_prefix = f"/api/v1/auth"
+
+
+class FakeOutbox:
+    """List backed stand-in for the redis client"""
+
+    def __init__(self):
+        self.outbox = []
+
+    async def rpush(self, key, *values):
+        self.outbox.extend(values)
+
+
+def use_redis(monkeypatch, redis):
+    """Point the mail worker, and its outbox scripts, at `redis`"""
+    monkeypatch.setattr(celery_tasks, "redis_client", redis)
+    for name, source in (
+        ("claim_mail_script", celery_tasks.CLAIM_MAIL_SCRIPT),
+        ("recover_mail_script", celery_tasks.RECOVER_MAIL_SCRIPT),
+    ):
+        monkeypatch.setattr(celery_tasks, name, redis.register_script(source))
+
+
+def test_password_reset_request_only_enqueues(monkeypatch):
+    """Test the password reset request queues the email instead of sending it"""
+    redis = FakeOutbox()
+    schedule_drain = AsyncMock()
+    monkeypatch.setattr(mail_dispatch, "redis_client", redis)
+    monkeypatch.setattr(mail_dispatch, "schedule_drain", schedule_drain)
+
+    client = TestClient(app, base_url="http://localhost")
+    response = client.post(
+        f"{auth_prefix}/password-reset-request", json={"email": "user@example.com"}
+    )
+
+    assert response.status_code == 200
+    entry = json.loads(redis.outbox[0])
+    assert len(redis.outbox) == 1
+    assert entry["recipients"] == ["user@example.com"]
+    assert entry["template"] == "password_reset"
+    assert "/password-reset-confirm/" in entry["params"]["link"]
+    schedule_drain.assert_awaited_once()
+
+
+def test_send_email_reuses_pooled_connection(monkeypatch, smtp_server, smtp_mail):
+    """Test the mail worker delivers many emails over one SMTP connection"""
+    pool = SMTPPool(smtp_mail.config)
+    monkeypatch.setattr(celery_tasks, "smtp_pool", pool)
+
+    for number in range(3):
+        assert celery_tasks.send_email(
+            ["user@example.com"], f"Subject {number}", "<p>body</p>"
+        )
+    celery_tasks.worker_loop.run(pool.close())
+
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+    assert smtp_server.messages[0]["recipients"] == ["user@example.com"]
+
+
+def outbox_entries(count: int) -> list:
+    return [
+        json.dumps(
+            {"recipients": [f"{n}@example.com"], "template": "welcome", "params": {}}
+        )
+        for n in range(count)
+    ]
+
+
+def test_drain_outbox_requeues_failures(monkeypatch, fake_redis):
+    """Test a drain sends every batch and requeues failed emails for later"""
+
+    async def send_many(messages):
+        return [m for m in messages if m.recipients == ["3@example.com"]]
+
+    schedule_drain = AsyncMock()
+    use_redis(monkeypatch, fake_redis)
+    monkeypatch.setattr(celery_tasks, "smtp_pool", Mock(send_many=send_many))
+    monkeypatch.setattr(celery_tasks, "schedule_drain", schedule_drain)
+
+    async def drain():
+        await fake_redis.rpush(MAIL_OUTBOX_KEY, *outbox_entries(5))
+        sent = await celery_tasks.drain_outbox(batch_size=2)
+        return sent, await fake_redis.lrange(MAIL_OUTBOX_KEY, 0, -1)
+
+    sent, outbox = asyncio.run(drain())
+
+    assert sent == 4
+    assert [json.loads(entry)["attempts"] for entry in outbox] == [2]
+    schedule_drain.assert_awaited_once()
+
+
+def test_drain_outbox_recovers_lost_drain(monkeypatch, fake_redis):
+    """Test emails claimed by a drain that died are sent by the next one"""
+    sent_to = []
+
+    async def send_many(messages):
+        sent_to.extend(message.recipients[0] for message in messages)
+        return []
+
+    use_redis(monkeypatch, fake_redis)
+    monkeypatch.setattr(celery_tasks, "smtp_pool", Mock(send_many=send_many))
+
+    async def drain_after_crash():
+        # a drain claimed a batch and was killed before sending it
+        await fake_redis.rpush(MAIL_PROCESSING_KEY.format("lost"), *outbox_entries(2))
+        await fake_redis.zadd(MAIL_LEASES_KEY, {"lost": time.time() - 1})
+        sent = await celery_tasks.drain_outbox()
+        return sent, await fake_redis.keys("mail:outbox*")
+
+    sent, keys = asyncio.run(drain_after_crash())
+
+    assert sent == 2
+    assert sorted(sent_to) == ["0@example.com", "1@example.com"]
+    assert keys == []
+
+
+def test_drain_outbox_dead_letters_corrupt_entries(monkeypatch, fake_redis):
+    """Test a corrupt entry is set aside and the rest of its batch is sent"""
+    sent_to = []
+
+    async def send_many(messages):
+        sent_to.extend(message.recipients[0] for message in messages)
+        return []
+
+    use_redis(monkeypatch, fake_redis)
+    monkeypatch.setattr(celery_tasks, "smtp_pool", Mock(send_many=send_many))
+
+    async def drain():
+        entries = outbox_entries(2)
+        await fake_redis.rpush(MAIL_OUTBOX_KEY, entries[0], "{corrupt", "[]", entries[1])
+        sent = await celery_tasks.drain_outbox()
+        return sent, await fake_redis.lrange(MAIL_DEAD_LETTER_KEY, 0, -1)
+
+    sent, dead = asyncio.run(drain())
+
+    assert sent == 2
+    assert sorted(sent_to) == ["0@example.com", "1@example.com"]
+    assert dead == ["{corrupt", "[]"]
+
+
+def test_send_email_chunk_retries_failed_recipients(monkeypatch):
+    """Test a chunk sends one email per recipient and retries only failures"""
+    sent_to = []
+
+    async def send_many(messages):
+        sent_to.extend(message.recipients for message in messages)
+        return [m for m in messages if m.recipients == ["2@example.com"]]
+
+    monkeypatch.setattr(celery_tasks, "smtp_pool", Mock(send_many=send_many))
+    retry = Mock(side_effect=RuntimeError("retry"))
+    monkeypatch.setattr(celery_tasks.send_email_chunk, "retry", retry)
+
+    recipients = [f"{n}@example.com" for n in range(3)]
+    with pytest.raises(RuntimeError):
+        celery_tasks.send_email_chunk(recipients, "welcome", {})
+
+    assert len(sent_to) == 3
+    assert retry.call_args.kwargs["args"] == (["2@example.com"], "welcome", {})
+    assert retry.call_args.kwargs["kwargs"] == {"sent": 2}
+
+
+def test_dispatch_bulk_mail_chunks_recipients(monkeypatch):
+    """Test bulk mail is split into one chunk task per chunk_size recipients"""
+    apply_async = Mock()
+    monkeypatch.setattr(mail_dispatch.group, "apply_async", apply_async)
+    recipients = [f"{n}@example.com" for n in range(5)]
+
+    job = asyncio.run(
+        mail_dispatch.dispatch_bulk_mail(recipients, "welcome", chunk_size=2)
+    )
+
+    assert job["chunks"] == 3
+    assert job["recipients"] == 5
+
+
+def test_mail_templates_render_escaped():
+    """Test templates are compiled once, cached and autoescaped"""
+    mail_templates.load()
+
+    message = mail_templates.create_message(
+        ["user@example.com"], "magic_link", {"link": 'https://x/"><script>'}
+    )
+
+    assert message.subject == "Login using magic link"
+    assert "&#34;&gt;&lt;script&gt;" in message.body
+    assert mail_templates._template("magic_link") is mail_templates._template(
+        "magic_link"
+    )
+
+
+def test_send_mail_requires_admin_and_caps_recipients(monkeypatch):
+    """Test bulk mail needs a token and oversized jobs are never dispatched"""
+    dispatch = AsyncMock(return_value={"id": "job"})
+    monkeypatch.setattr(auth_routes, "dispatch_bulk_mail", dispatch)
+    mail_app = FastAPI()
+    register_all_errors(mail_app)
+    mail_app.include_router(auth_routes.auth_router, prefix=auth_prefix)
+    client = TestClient(mail_app, base_url="http://localhost")
+    emails = [f"user{number}@example.com" for number in range(MAIL_MAX_RECIPIENTS)]
+
+    anonymous = client.post(f"{auth_prefix}/send_mail", json={"email_addresses": emails})
+    progress = client.get(f"{auth_prefix}/send_mail/job")
+    mail_app.dependency_overrides[auth_routes.access_token_bearer] = lambda: {}
+    mail_app.dependency_overrides[auth_routes.admin_checker] = lambda: True
+    oversized = client.post(
+        f"{auth_prefix}/send_mail",
+        json={"email_addresses": emails + ["one@example.com"]},
+    )
+    invalid = client.post(
+        f"{auth_prefix}/send_mail", json={"email_addresses": ["not an address"]}
+    )
+    accepted = client.post(f"{auth_prefix}/send_mail", json={"email_addresses": emails})
+
+    assert anonymous.status_code == 403
+    assert progress.status_code == 403
+    assert oversized.status_code == 422
+    assert invalid.status_code == 422
+    assert accepted.status_code == 200
+    dispatch.assert_awaited_once_with(emails, "welcome")
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""Access log middleware tests"""
+
+import io
+import json
+import logging
+import queue
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from api.core.timing import TimedRoute, timed
+from api.v1.middleware import (
+    AccessLogQueueHandler,
+    access_logger,
+    create_access_log_listener,
+    register_middleware,
+)
+
+
+def test_access_log_timing_breakdown():
+    """Test one JSON line per request with auth, db and serialization timings"""
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/items")
+    async def items():
+        with timed("auth"):
+            pass
+        with timed("db"):
+            pass
+        with timed("db"):
+            pass
+        return [{"id": number} for number in range(100)]
+
+    app = FastAPI()
+    register_middleware(app)
+    app.include_router(router)
+
+    stream = io.StringIO()
+    listener = create_access_log_listener(stream)
+    listener.start()
+    try:
+        response = TestClient(app, base_url="http://localhost").get("/items?q=x")
+    finally:
+        listener.stop()
+        access_logger.handlers.clear()
+
+    entry = json.loads(stream.getvalue())
+    assert response.status_code == 200
+    assert entry["path"] == "/items"
+    assert entry["status"] == 200
+    assert entry["timings"]["db_calls"] == 2
+    assert entry["timings"]["auth_calls"] == 1
+    assert entry["timings"]["serialization_calls"] == 1
+
+
+def test_access_log_queue_drops_when_full():
+    """Test a full queue drops records instead of blocking"""
+    handler = AccessLogQueueHandler(queue.Queue(maxsize=1))
+    record = logging.makeLogRecord({"msg": "request"})
+
+    handler.emit(record)
+    handler.emit(record)
+
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""Rate limiter tests"""
+
+import asyncio
+from unittest.mock import AsyncMock
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+from starlette.requests import Request
+from api.db import redis
+from api.v1 import rate_limit
+from api.v1.errors import register_all_errors
+from api.v1.rate_limit import RateLimiter, UserRateLimiter, parse_rate
+
+
+def limited_client(limiter: RateLimiter) -> TestClient:
+    router = APIRouter(dependencies=[Depends(limiter)])
+
+    @router.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    app = FastAPI()
+    register_all_errors(app)
+    app.include_router(router)
+    return TestClient(app, base_url="http://localhost")
+
+
+def test_parse_rate():
+    """Test rates are parsed into requests per seconds"""
+    assert parse_rate("5/minute") == (5, 60)
+    assert parse_rate("60/m") == (60, 60)
+    assert parse_rate("1000/Hour") == (1000, 3600)
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
+    with pytest.raises(ValueError):
+        parse_rate("0/second")
+
+
+def test_rate_limited_per_route_and_client(monkeypatch):
+    """Test one script call per request and a 429 with Retry-After"""
+    hit = AsyncMock(side_effect=[(True, 0, 4), (False, 1500, 0)])
+    monkeypatch.setattr(rate_limit, "rate_limit_hit", hit)
+    client = limited_client(RateLimiter("5/minute", "items"))
+
+    allowed = client.get("/items/1")
+    rejected = client.get("/items/2")
+
+    assert allowed.status_code == 200
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "2"
+    assert rejected.json()["error_code"] == "RATE_LIMITED"
+    key, interval_ms, tolerance_ms = hit.await_args.args
+    assert key == "ratelimit:items:GET:/items/{item_id}:testclient"
+    assert (interval_ms, tolerance_ms) == (12000, 60000)
+
+
+def test_rate_limit_script_bursts_then_rejects(monkeypatch, fake_redis):
+    """Test the GCRA script allows a burst, then rejects with Retry-After"""
+    script = fake_redis.register_script(redis.RATE_LIMIT_SCRIPT)
+    monkeypatch.setattr(redis, "rate_limit_script", script)
+    client = limited_client(RateLimiter("3/minute", "items"))
+
+    burst = [client.get(f"/items/{item_id}") for item_id in range(3)]
+    rejected = client.get("/items/3")
+
+    assert [response.status_code for response in burst] == [200, 200, 200]
+    assert rejected.status_code == 429
+    # the next request fits one interval (20s) after the burst
+    assert 19 <= int(rejected.headers["Retry-After"]) <= 20
+    allowed, retry_after_ms, remaining = asyncio.run(
+        redis.rate_limit_hit("ratelimit:other", 20000, 60000)
+    )
+    assert (allowed, retry_after_ms, remaining) == (True, 0, 2)
+
+
+def test_rate_limiter_fails_open(monkeypatch):
+    """Test requests are allowed when Redis is unreachable"""
+    hit = AsyncMock(side_effect=ConnectionError("redis is down"))
+    monkeypatch.setattr(rate_limit, "rate_limit_hit", hit)
+
+    response = limited_client(RateLimiter("5/minute", "items")).get("/items/1")
+
+    assert response.status_code == 200
+    hit.assert_awaited_once()
+
+
+def test_user_rate_limiter_keys_by_user(monkeypatch):
+    """Test task limits are counted per user rather than per address"""
+    hit = AsyncMock(return_value=(True, 0, 9))
+    monkeypatch.setattr(rate_limit, "rate_limit_hit", hit)
+    request = Request(
+        {"type": "http", "method": "POST", "path": "/tasks", "headers": []}
+    )
+
+    asyncio.run(
+        UserRateLimiter("10/second", "tasks")(request, {"user": {"user_id": "42"}})
+    )
+
+    assert hit.await_args.args[0] == "ratelimit:tasks:POST:/tasks:42"
@@ -0,0 +1,22 @@
+#!/usr/bin/python3
+"""Bulk seeding tests"""
+
+import pytest
+
+pytest.importorskip("faker")
+
+from seeds import bulk  # noqa: E402
+
+
+def test_seeding_again_continues_numbering():
+    """Test a second run with the same seed creates new ids and emails"""
+    bulk._init_worker(42, [])
+
+    first = bulk.generate_users(0, 50, "hash", 42)
+    again = bulk.generate_users(50, 50, "hash", 42)
+
+    assert bulk.generate_users(0, 50, "hash", 42) == first
+    assert not {user[0] for user in first} & {user[0] for user in again}
+    assert not {user[3] for user in first} & {user[3] for user in again}
+    tasks = bulk.generate_tasks(0, 10, 42) + bulk.generate_tasks(10, 10, 42)
+    assert len({task[0] for task in tasks}) == 20
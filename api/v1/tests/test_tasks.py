@@ -1,6 +1,34 @@
 #!/usr/bin/python3
 """test Task Module"""
 
+import asyncio
+import base64
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+from api.v1.auth.dependencies import access_token_bearer
+from api.v1.errors import InvalidCursor, InvalidImportFile, InvalidPagination
+from api.v1.tasks import routes as task_routes
+from api.v1.tasks.models import Task
+from api.v1.tasks.schema import TaskUpdate
+from api.v1.tasks.service import TaskService
+from api.v1.tasks.utils import (
+    encode_cursor,
+    decode_cursor,
+    csv_header,
+    tasks_to_csv,
+    tasks_to_ndjson,
+    TaskImportReader,
+)
+
 tasks_prefix = f"/api/v1/tasks"
 
 
@@ -29,3 +57,225 @@ def test_create_task(test_client, fake_task_service, fake_session):
 
     assert fake_task_service.create_task_called_once()
     assert fake_task_service.create_task_called_once_with(task_data, fake_session)
+
+
+def test_cursor_round_trip():
+    """Test pagination cursors decode to the position they encode"""
+    created_at = datetime(2024, 11, 7, 2, 41, 2, 505523)
+    task_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, task_id)
+
+    assert decode_cursor(cursor) == (created_at, task_id)
+
+
+@pytest.mark.parametrize(
+    "payload", [None, b"not json", b'["2024-01-01T00:00:00", 5]', b"[1, 2, 3]"]
+)
+def test_invalid_cursor(payload):
+    """Test a malformed cursor is rejected"""
+    cursor = "not-a-cursor"
+    if payload is not None:
+        cursor = base64.urlsafe_b64encode(payload).decode("ascii")
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_skip_rejected_with_cursor():
+    """Test skip is not silently ignored in cursor mode"""
+    with pytest.raises(InvalidPagination):
+        asyncio.run(
+            task_routes.get_all_tasks(
+                skip=20, paginate="cursor", tags=None, session=Mock(), token_details={}
+            )
+        )
+
+
+@pytest.mark.parametrize(
+    "path", ["/tasks/?paginate=cursor&limit=0", "/tasks/user/1?limit=-5"]
+)
+def test_page_limit_validated(monkeypatch, path):
+    """Test a limit outside 1..PAGE_MAX_LIMIT is a 422, not a failed query"""
+    get_page = AsyncMock()
+    monkeypatch.setattr(task_routes.task_service, "get_tasks_page", get_page)
+    monkeypatch.setattr(task_routes.task_service, "get_user_tasks", get_page)
+    tasks_app = FastAPI()
+    tasks_app.include_router(task_routes.task_router, prefix="/tasks")
+    tasks_app.dependency_overrides[access_token_bearer] = lambda: {
+        "user": {"user_id": "1"}
+    }
+    tasks_app.dependency_overrides[task_routes.role_checker.dependency] = lambda: True
+    tasks_app.dependency_overrides[task_routes.get_task_read_session] = lambda: Mock()
+
+    response = TestClient(tasks_app).get(path)
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["query", "limit"]
+    get_page.assert_not_awaited()
+
+
+@pytest.mark.parametrize("tags_match, operator", [("all", "@>"), ("any", "&&")])
+def test_tags_filter_operator(tags_match, operator):
+    """Test tag filters use the GIN-indexable array operators"""
+    statement = TaskService()._filter(
+        select(Task), None, None, ["test", "tag"], tags_match
+    )
+
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert f"tasks.tags {operator}" in sql
+
+
+def test_bulk_delete_single_statement():
+    """Test bulk delete issues one DELETE ... = ANY(...) and one commit"""
+    session = Mock()
+    session.exec = AsyncMock(return_value=Mock(all=Mock(return_value=[(1,), (2,)])))
+    session.commit = AsyncMock()
+
+    deleted = asyncio.run(
+        TaskService().delete_tasks([uuid.uuid4(), uuid.uuid4()], session)
+    )
+
+    sql = str(session.exec.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert deleted == 2
+    assert "= ANY" in sql
+    session.exec.assert_awaited_once()
+    session.commit.assert_awaited_once()
+
+
+def test_bulk_create_keeps_request_order():
+    """Test bulk insert asks for RETURNING rows in parameter order"""
+    session = Mock()
+    session.exec = AsyncMock(return_value=Mock())
+    session.commit = AsyncMock()
+    tasks = [{"title": "first"}, {"title": "second"}]
+
+    asyncio.run(TaskService().create_tasks(tasks, uuid.uuid4(), session))
+
+    statement = session.exec.call_args[0][0]
+    assert statement._sort_by_parameter_order is True
+    assert [row["title"] for row in session.exec.call_args[1]["params"]] == [
+        "first",
+        "second",
+    ]
+
+
+def test_update_task_not_found():
+    """Test updating a missing task is a single UPDATE that returns None"""
+    session = Mock()
+    result = Mock()
+    result.scalars.return_value.first.return_value = None
+    session.exec = AsyncMock(return_value=result)
+    session.commit = AsyncMock()
+
+    task_data = TaskUpdate(status="done")
+
+    task = asyncio.run(TaskService().update_task(str(uuid.uuid4()), task_data, session))
+
+    sql = str(session.exec.call_args[0][0].compile(dialect=postgresql.dialect()))
+    assert task is None
+    assert sql.startswith("UPDATE tasks")
+    assert "RETURNING" in sql
+    session.exec.assert_awaited_once()
+
+
+def test_export_csv_rows():
+    """Test CSV export writes one row per task with tags as JSON"""
+    task = Task(
+        id=uuid.uuid4(),
+        title="test title",
+        description="test, description",
+        status="todo",
+        tags=["test", "tag"],
+        created_at=datetime(2024, 11, 7),
+        updated_at=datetime(2024, 11, 7),
+    )
+
+    rows = list(csv.DictReader(io.StringIO(csv_header() + tasks_to_csv([task]))))
+
+    assert len(rows) == 1
+    assert rows[0]["description"] == "test, description"
+    assert json.loads(rows[0]["tags"]) == ["test", "tag"]
+
+
+def test_export_ndjson_lines():
+    """Test NDJSON export writes one JSON document per line"""
+    task = {
+        "id": str(uuid.uuid4()),
+        "title": "test title",
+        "description": "test description",
+        "due_date": None,
+        "status": "todo",
+        "created_at": "2024-11-07T00:00:00",
+        "updated_at": "2024-11-07T00:00:00",
+    }
+
+    lines = tasks_to_ndjson([task, task]).splitlines()
+
+    assert len(lines) == 2
+    assert json.loads(lines[0])["title"] == "test title"
+
+
+def test_import_reader_csv_round_trip():
+    """Test a CSV export can be read back by the importer"""
+    task = Task(
+        id=uuid.uuid4(),
+        title="test title",
+        description="test, description",
+        status="todo",
+        tags=["test", "tag"],
+        created_at=datetime(2024, 11, 7),
+        updated_at=datetime(2024, 11, 7),
+    )
+    upload = io.BytesIO((csv_header() + tasks_to_csv([task])).encode("utf-8"))
+
+    reader = TaskImportReader(upload, "csv")
+    tasks = reader.read_chunk(10)
+
+    assert len(tasks) == 1
+    assert tasks[0].tags == ["test", "tag"]
+    assert reader.read_chunk(10) == []
+
+
+def test_import_tasks_reports_invalid_rows():
+    """Test invalid rows are reported and valid ones are copied in chunks"""
+    rows = [
+        {"title": "one", "description": "a", "due_date": None, "status": "todo"},
+        {"description": "missing title", "due_date": None, "status": "todo"},
+        "not json",
+        {"title": "two", "description": "b", "due_date": None, "status": "done"},
+        {"title": "three", "description": "c", "due_date": None, "status": "done"},
+    ]
+    lines = [row if isinstance(row, str) else json.dumps(row) for row in rows]
+    upload = io.BytesIO("\n".join(lines).encode("utf-8"))
+    reader = TaskImportReader(upload, "ndjson")
+
+    service = TaskService()
+    service.copy_tasks = AsyncMock(side_effect=lambda tasks, *args: len(tasks))
+    session = Mock(commit=AsyncMock())
+
+    imported = asyncio.run(
+        service.import_tasks(reader, str(uuid.uuid4()), session, chunk_size=2)
+    )
+
+    assert imported == 3
+    assert service.copy_tasks.await_count == 2
+    assert reader.failed == 2
+    assert [error["row"] for error in reader.errors] == [2, 3]
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.parametrize(
+    "import_format, content",
+    [
+        ("ndjson", '{"title": "caf\xe9"}\n'.encode("latin-1")),
+        ("csv", ("title\n" + "x" * (csv.field_size_limit() + 1)).encode("utf-8")),
+    ],
+)
+def test_import_reader_rejects_unreadable_file(import_format, content):
+    """Test undecodable or unparseable uploads are rejected, not a 500"""
+    reader = TaskImportReader(io.BytesIO(content), import_format)
+
+    with pytest.raises(InvalidImportFile):
+        reader.read_chunk(10)
@@ -0,0 +1,2 @@
+#!/usr/bin/python3
+"""Benchmarks of the API and of its per-request primitives"""
@@ -0,0 +1,290 @@
+#!/usr/bin/python3
+"""Throughput and latency benchmarks of the API hot paths
+
+Runs against a live server backed by a throwaway Postgres and Redis
+(seed it first with `python -m seeds`), e.g.
+
+    python -m benchmarks.api --email someone@example.com --password password123
+
+Every request comes from one user and address, so start the server with
+RATE_LIMIT_ENABLED=false; a run that hits the rate limiter stops.
+"""
+
+import argparse
+import asyncio
+import itertools
+from collections import Counter
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Union
+import httpx
+from .report import summarize_latencies, write_report
+
+
+API_PREFIX = "/api/v1"
+SCENARIOS = [
+    "login",
+    "refresh",
+    "list",
+    "list_status",
+    "list_tags",
+    "list_deep_offset",
+    "list_deep_cursor",
+    "get",
+    "create",
+    "update",
+    "delete",
+]
+
+
+class Scenario:
+    """A named request factory.
+
+    `requests` overrides the default request count; a callable is
+    evaluated when the scenario starts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        request: Callable,
+        requests: Optional[Union[int, Callable[[], int]]] = None,
+        warmup: bool = True,
+    ):
+        self.name = name
+        self.request = request
+        self.requests = requests
+        self.warmup = warmup
+
+    def request_count(self, default: int) -> int:
+        """How many requests to issue"""
+        if callable(self.requests):
+            return self.requests()
+        return self.requests or default
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict:
+    """Issue `requests` calls from `concurrency` workers and time each one"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = itertools.count()
+
+    async def worker(total: int, record: bool):
+        while next(counter) < total:
+            started = perf_counter()
+            try:
+                response = await scenario.request(client)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if record:
+                latencies.append(perf_counter() - started)
+                statuses[str(status)] += 1
+
+    if warmup:
+        await asyncio.gather(*(worker(warmup, False) for _ in range(concurrency)))
+        counter = itertools.count()
+
+    started = perf_counter()
+    await asyncio.gather(*(worker(requests, True) for _ in range(concurrency)))
+    elapsed = perf_counter() - started
+
+    result = summarize_latencies(latencies, elapsed)
+    result["errors"] = sum(
+        count for status, count in statuses.items() if not status.startswith("2")
+    )
+    result["statuses"] = dict(statuses)
+    return result
+
+
+async def build_scenarios(client: httpx.AsyncClient, args) -> Dict[str, Scenario]:
+    """Log in once and collect the ids, tags and cursors the scenarios use"""
+    response = await client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": args.email, "password": args.password},
+    )
+    response.raise_for_status()
+    tokens = response.json()
+    access = {"Authorization": f"Bearer {tokens['access_token']}"}
+    refresh = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+
+    response = await client.get(
+        f"{API_PREFIX}/tasks/", params={"limit": 100}, headers=access
+    )
+    response.raise_for_status()
+    sample = response.json()
+    if not sample:
+        raise SystemExit("no tasks found; seed the database first")
+    sample_ids = [task["id"] for task in sample]
+    task_ids = itertools.cycle(sample_ids)
+    tag = next((task["tags"][0] for task in sample if task.get("tags")), None)
+    task_status = sample[0]["status"]
+
+    # walk the cursor chain once so the cursor scenario starts as deep
+    # as the offset scenario
+    cursor, depth = None, 0
+    while depth < args.deep_offset:
+        step = min(1000, args.deep_offset - depth)
+        params = {"paginate": "cursor", "limit": step}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(
+            f"{API_PREFIX}/tasks/", params=params, headers=access
+        )
+        response.raise_for_status()
+        cursor = response.json()["next_cursor"]
+        depth += step
+        if cursor is None:
+            break
+    deep_cursor = {"paginate": "cursor", "limit": args.page_size}
+    if cursor:
+        deep_cursor["cursor"] = cursor
+
+    created: List[str] = []
+    updated = itertools.count()
+    new_task = {
+        "title": "benchmark task",
+        "description": "created by benchmarks.api",
+        "due_date": None,
+        "status": "Pending",
+        "priority": "Low",
+        "tags": ["benchmark"],
+    }
+
+    def list_tasks(params):
+        params = dict(params)
+        return lambda c: c.get(f"{API_PREFIX}/tasks/", params=params, headers=access)
+
+    async def create(c):
+        response = await c.post(f"{API_PREFIX}/tasks/", json=new_task, headers=access)
+        if response.status_code == 201:
+            created.append(response.json()["id"])
+        return response
+
+    def update(c):
+        # updates the benchmark's own tasks once the create scenario ran
+        targets = created or sample_ids
+        task_id = targets[next(updated) % len(targets)]
+        return c.patch(
+            f"{API_PREFIX}/tasks/{task_id}",
+            json={"status": "In Progress"},
+            headers=access,
+        )
+
+    def delete(c):
+        return c.delete(f"{API_PREFIX}/tasks/{created.pop()}", headers=access)
+
+    page = {"limit": args.page_size}
+    scenarios = [
+        Scenario(
+            "login",
+            lambda c: c.post(
+                f"{API_PREFIX}/auth/login",
+                json={"email": args.email, "password": args.password},
+            ),
+            # bcrypt makes every login deliberately slow
+            requests=args.login_requests,
+        ),
+        Scenario(
+            "refresh",
+            lambda c: c.get(f"{API_PREFIX}/auth/refresh_token", headers=refresh),
+        ),
+        Scenario("list", list_tasks(page)),
+        Scenario("list_status", list_tasks(dict(page, status=task_status))),
+        Scenario("list_deep_offset", list_tasks(dict(page, skip=args.deep_offset))),
+        Scenario("list_deep_cursor", list_tasks(deep_cursor)),
+        Scenario(
+            "get",
+            lambda c: c.get(f"{API_PREFIX}/tasks/{next(task_ids)}", headers=access),
+        ),
+        Scenario("create", create),
+        Scenario("update", update),
+        # deletes exactly the tasks the create scenario made
+        Scenario("delete", delete, requests=created.__len__, warmup=False),
+    ]
+    if tag is not None:
+        scenarios.append(Scenario("list_tags", list_tasks(dict(page, tags=tag))))
+    return {scenario.name: scenario for scenario in scenarios}
+
+
+async def run(args) -> dict:
+    """Run the selected scenarios in order"""
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        scenarios = await build_scenarios(client, args)
+        # create always runs before update and delete
+        for name in sorted(args.scenarios, key=SCENARIOS.index):
+            scenario = scenarios.get(name)
+            if scenario is None:
+                print(f"{name:<18} skipped: the sampled tasks have no tags")
+                continue
+            results[name] = await run_scenario(
+                client,
+                scenario,
+                scenario.request_count(args.requests),
+                args.concurrency,
+                args.warmup if scenario.warmup else 0,
+            )
+            print(format_result(name, results[name]))
+            if results[name]["statuses"].get("429"):
+                raise SystemExit(
+                    f"{name} was rate limited; restart the server with "
+                    "RATE_LIMIT_ENABLED=false to benchmark it"
+                )
+    return results
+
+
+def format_result(name: str, result: dict) -> str:
+    """One line summary of a scenario"""
+    return (
+        f"{name:<18} {result['throughput']:>9.1f} req/s  "
+        f"p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+        f"p99 {result['p99_ms']:>8.2f}ms  errors {result['errors']}"
+    )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the benchmark options"""
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.api",
+        description="Benchmark the API hot paths against a running server.",
+    )
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True, help="an existing user")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("--login-requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--deep-offset", type=int, default=100000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS
+    )
+    parser.add_argument("-o", "--output", help="report path (benchmarks/results)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    """Entry point of the API benchmark"""
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    options = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("password", "output")
+    }
+    print(f"report written to {write_report('api', results, options, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""Compare two benchmark reports
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 10
+
+Exits with status 1 when any shared benchmark regressed by more than the
+threshold (in percent).
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Tuple
+
+
+# metric -> True when a higher value is better
+METRICS = {
+    "throughput": True,
+    "ops_per_sec": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "us_per_call": False,
+    "allocated_bytes_per_call": False,
+}
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> Tuple[List, List]:
+    """Return (rows, regressions) for the benchmarks both reports share"""
+    rows, regressions = [], []
+    for name, old in baseline["results"].items():
+        new = candidate["results"].get(name)
+        if new is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in old or metric not in new:
+                continue
+            before, after = old[metric], new[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            worse = -change if higher_is_better else change
+            row = (name, metric, before, after, change)
+            rows.append(row)
+            if worse > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def main(argv=None) -> int:
+    """Entry point of the report comparison"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="allowed regression in percent"
+    )
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+        baseline, candidate = json.load(baseline_file), json.load(candidate_file)
+
+    print(f"baseline  {baseline['git']['sha'][:12]}  {baseline['created_at']}")
+    print(f"candidate {candidate['git']['sha'][:12]}  {candidate['created_at']}")
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        name, metric, before, after, change = row
+        flag = "  REGRESSION" if row in regressions else ""
+        print(
+            f"{name:<24} {metric:<26} {before:>12.3f} -> {after:>12.3f} "
+            f"({change:+.1f}%){flag}"
+        )
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
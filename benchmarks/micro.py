@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+"""Microbenchmarks of the primitives every request runs
+
+    python -m benchmarks.micro [--filter token] [-o report.json]
+
+Reports ops/sec, microseconds per call and the memory allocated while a
+call runs (tracemalloc peak, averaged over calls).
+"""
+
+import argparse
+import json
+import timeit
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+from api.v1.auth.utils import (
+    create_access_token,
+    decode_access_token,
+    create_url_safe_token,
+    generate_password_hash,
+    verify_password,
+)
+from api.v1.tasks.models import Task
+from api.v1.tasks.schema import TaskModel
+from api.v1.tasks.utils import dump_tasks, task_list_adapter
+from .report import write_report
+
+
+def make_task(number: int = 0) -> Task:
+    """A fully populated task as the ORM returns it"""
+    now = datetime(2024, 11, 7, 12, 0, 0)
+    return Task(
+        id=uuid.uuid4(),
+        title=f"benchmark task {number}",
+        description="a task description of a realistic length " * 4,
+        due_date=now + timedelta(days=7),
+        status="Pending",
+        priority="High",
+        assigned_to="someone@example.com",
+        tags=["backend", "performance"],
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def build_benchmarks() -> Dict[str, Callable[[], object]]:
+    """Name -> zero-argument callable"""
+    user_data = {
+        "email": "someone@example.com",
+        "user_id": str(uuid.uuid4()),
+        "role": "user",
+    }
+    token = create_access_token(user_data=user_data)
+    password_hash = generate_password_hash("password123")
+    task = make_task()
+    tasks = [make_task(number) for number in range(100)]
+
+    return {
+        "create_access_token": lambda: create_access_token(user_data=user_data),
+        "decode_access_token": lambda: decode_access_token(token),
+        "create_url_safe_token": lambda: create_url_safe_token(
+            {"email": user_data["email"]}
+        ),
+        "verify_password": lambda: verify_password("password123", password_hash),
+        "task_model_dump_json": lambda: TaskModel.model_validate(
+            task, from_attributes=True
+        ).model_dump_json(),
+        # the path FastAPI takes for a List[TaskModel] response_model
+        "task_list_100_response": lambda: json.dumps(dump_tasks(tasks)),
+        "task_list_100_dump_json": lambda: task_list_adapter.dump_json(
+            task_list_adapter.validate_python(tasks, from_attributes=True)
+        ),
+    }
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> dict:
+    """Best-of-`repeat` timing and average allocation of one call"""
+    timer = timeit.Timer(func)
+    loops, _ = timer.autorange()
+    loops = max(int(loops * min_time / 0.2), 1)
+    best = min(timer.repeat(repeat=repeat, number=loops)) / loops
+
+    calls = min(loops, 100)
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "loops": loops,
+        "ops_per_sec": round(1 / best, 2),
+        "us_per_call": round(best * 1e6, 3),
+        "allocated_bytes_per_call": round(allocated / calls),
+    }
+
+
+def main(argv=None) -> None:
+    """Entry point of the microbenchmarks"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.micro")
+    parser.add_argument("--filter", default="", help="only names containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per timed repeat"
+    )
+    parser.add_argument("-o", "--output", help="report path (benchmarks/results)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, func in build_benchmarks().items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(func, args.repeat, args.min_time)
+        result = results[name]
+        print(
+            f"{name:<26} {result['ops_per_sec']:>12.1f} ops/s  "
+            f"{result['us_per_call']:>10.2f} us/call  "
+            f"{result['allocated_bytes_per_call']:>8} B/call"
+        )
+
+    options = {key: value for key, value in vars(args).items() if key != "output"}
+    print(f"report written to {write_report('micro', results, options, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
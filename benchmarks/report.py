@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""Result summaries and JSON reports shared by the benchmarks"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import List, Optional
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize_latencies(latencies: List[float], elapsed: float) -> dict:
+    """Throughput and latency percentiles (in milliseconds) of a run"""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "throughput": round(count / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+    }
+
+
+def git_revision() -> dict:
+    """Commit the benchmark ran against and whether the tree was dirty"""
+    try:
+        sha = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+        dirty = bool(
+            subprocess.check_output(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                text=True,
+                stderr=subprocess.DEVNULL,
+            ).strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {"sha": "unknown", "dirty": False}
+    return {"sha": sha, "dirty": dirty}
+
+
+def write_report(
+    suite: str, results: dict, options: dict, output: Optional[str] = None
+) -> str:
+    """Write a report tagged with the git revision; returns its path"""
+    revision = git_revision()
+    now = datetime.now(timezone.utc)
+    report = {
+        "suite": suite,
+        "git": revision,
+        "created_at": now.isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": options,
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        filename = f"{suite}-{revision['sha'][:12]}-{now:%Y%m%dT%H%M%S}.json"
+        output = os.path.join(RESULTS_DIR, filename)
+
+    with open(output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+    return output
@@ -0,0 +1,29 @@
+"""replaced tags index with gin
+
+Revision ID: 5e8a9d4c61b2
+Revises: b3c1f0d27a94
+Create Date: 2026-10-18 10:04:17.226905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a9d4c61b2'
+down_revision: Union[str, None] = 'b3c1f0d27a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f('ix_tasks_tags'), table_name='tasks')
+    op.create_index('ix_tasks_tags', 'tasks', ['tags'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_tags', table_name='tasks', postgresql_using='gin')
+    op.create_index(op.f('ix_tasks_tags'), 'tasks', ['tags'], unique=False)
@@ -0,0 +1,35 @@
+"""added listing composite indexes
+
+Revision ID: 9f2d7b3e0c15
+Revises: 5e8a9d4c61b2
+Create Date: 2026-10-18 10:41:52.803117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f2d7b3e0c15'
+down_revision: Union[str, None] = '5e8a9d4c61b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # the composite indexes lead with status/priority, so the single-column
+    # indexes become redundant
+    op.create_index('ix_tasks_status_created_at_id', 'tasks', ['status', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tasks_priority_created_at_id', 'tasks', ['priority', 'created_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_tasks_status'), table_name='tasks')
+    op.drop_index(op.f('ix_tasks_priority'), table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_tasks_priority'), 'tasks', ['priority'], unique=False)
+    op.create_index(op.f('ix_tasks_status'), 'tasks', ['status'], unique=False)
+    op.drop_index('ix_tasks_priority_created_at_id', table_name='tasks')
+    op.drop_index('ix_tasks_status_created_at_id', table_name='tasks')
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Command line entry point of the seeding tool
+
+Usage: python -m seeds --users 100000 --tasks 5000000
+"""
+
+import argparse
+import asyncio
+from api.core.config import Config
+from .bulk import seed
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse the seeding options"""
+    parser = argparse.ArgumentParser(
+        prog="python -m seeds",
+        description="Generate users and tasks with COPY for load testing.",
+    )
+    parser.add_argument("--users", type=int, default=0, help="users to create")
+    parser.add_argument("--tasks", type=int, default=0, help="tasks to create")
+    parser.add_argument(
+        "--database-url",
+        default=Config.DATABASE_URL,
+        help="target database (defaults to DATABASE_URL)",
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="generator processes (CPU count)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="random seed (random by default)"
+    )
+    parser.add_argument(
+        "--password", default="password123", help="password of every seeded user"
+    )
+    parser.add_argument(
+        "--create-tables", action="store_true", help="create missing tables first"
+    )
+    parser.add_argument(
+        "--truncate", action="store_true", help="empty tasks and users first"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    """Entry point of the seeding tool"""
+    args = parse_args(argv)
+    result = asyncio.run(
+        seed(
+            args.database_url,
+            users=args.users,
+            tasks=args.tasks,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            seed_value=args.seed,
+            password=args.password,
+            create_tables=args.create_tables,
+            truncate=args.truncate,
+        )
+    )
+    print(
+        f"Seeded {result['users']} users and {result['tasks']} tasks "
+        f"in {result['seconds']}s (seed {result['seed']})"
+    )
+
+
+if __name__ == "__main__":
+    main()
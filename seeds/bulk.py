@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+"""Bulk seeding of users and tasks for load testing"""
+
+import asyncio
+import os
+import random
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from time import perf_counter
+from typing import List, Optional, Sequence
+from faker import Faker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from api.v1.auth.models import User
+from api.v1.auth.utils import generate_password_hash
+from api.v1.tasks.models import Task
+
+
+USER_COLUMNS = [
+    "id",
+    "created_at",
+    "updated_at",
+    "email",
+    "username",
+    "password",
+    "isVerified",
+    "role",
+]
+TASK_COLUMNS = [
+    "id",
+    "created_at",
+    "updated_at",
+    "title",
+    "description",
+    "due_date",
+    "status",
+    "priority",
+    "assigned_to",
+    "tags",
+    "user_id",
+]
+
+STATUSES = ["Pending", "In Progress", "Completed"]
+STATUS_WEIGHTS = [45, 20, 35]
+PRIORITIES = ["Low", "Medium", "High", None]
+PRIORITY_WEIGHTS = [35, 40, 15, 10]
+HISTORY_DAYS = 365
+POOL_SIZE = 2000
+TAG_VOCABULARY = 60
+
+# per-process pools of fake values; building a row from Faker directly is
+# far too slow for millions of rows, so rows sample from these instead
+_pool = {}
+
+
+def _init_worker(seed: int, user_ids: Sequence[uuid.UUID]) -> None:
+    """Build the value pools of a generator process"""
+    fake = Faker()
+    Faker.seed(seed)
+    _pool["titles"] = [fake.sentence(nb_words=6) for _ in range(POOL_SIZE)]
+    _pool["descriptions"] = [fake.text(max_nb_chars=300) for _ in range(POOL_SIZE)]
+    _pool["usernames"] = [fake.user_name() for _ in range(POOL_SIZE)]
+    _pool["domains"] = [fake.free_email_domain() for _ in range(20)]
+    _pool["emails"] = [fake.email() for _ in range(POOL_SIZE)]
+    _pool["tags"] = list(dict.fromkeys(fake.words(nb=TAG_VOCABULARY * 2)))[
+        :TAG_VOCABULARY
+    ]
+    # a few tags are very common and most are rare
+    _pool["tag_weights"] = [1 / rank for rank in range(1, len(_pool["tags"]) + 1)]
+    _pool["user_ids"] = list(user_ids)
+    # a heavy tail: a few users own most of the tasks
+    rng = random.Random(seed)
+    _pool["user_weights"] = list(accumulate(rng.paretovariate(1.2) for _ in user_ids))
+    _pool["now"] = datetime.now()
+
+
+def generate_users(start: int, count: int, password_hash: str, seed: int) -> list:
+    """Generate a batch of user records in USER_COLUMNS order; start is
+    the number of the first user, which keeps emails and usernames unique
+    """
+    rng = random.Random(f"users:{seed}:{start}")
+    now = _pool["now"]
+    records = []
+    for number in range(start, start + count):
+        username = rng.choice(_pool["usernames"])
+        created_at = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        records.append(
+            (
+                uuid.UUID(int=rng.getrandbits(128), version=4),
+                created_at,
+                created_at,
+                f"{username}.{number}@{rng.choice(_pool['domains'])}",
+                f"{username}{number}",
+                password_hash,
+                rng.random() < 0.75,
+                "admin" if rng.random() < 0.01 else "user",
+            )
+        )
+    return records
+
+
+def generate_tasks(start: int, count: int, seed: int) -> list:
+    """Generate a batch of task records in TASK_COLUMNS order"""
+    rng = random.Random(f"tasks:{seed}:{start}")
+    now = _pool["now"]
+    user_ids = _pool["user_ids"]
+    owners = (
+        rng.choices(user_ids, cum_weights=_pool["user_weights"], k=count)
+        if user_ids
+        else [None] * count
+    )
+    statuses = rng.choices(STATUSES, STATUS_WEIGHTS, k=count)
+    priorities = rng.choices(PRIORITIES, PRIORITY_WEIGHTS, k=count)
+    records = []
+    for owner, task_status, priority in zip(owners, statuses, priorities):
+        created_at = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        age = (now - created_at).total_seconds()
+        updated_at = created_at + timedelta(seconds=rng.random() * age)
+        due_date = None
+        if rng.random() < 0.8:
+            due_date = (created_at + timedelta(days=rng.randint(1, 60))).replace(
+                tzinfo=timezone.utc
+            )
+        tags = rng.choices(
+            _pool["tags"], _pool["tag_weights"], k=rng.choice((0, 1, 1, 2, 2, 3, 4))
+        )
+        records.append(
+            (
+                uuid.UUID(int=rng.getrandbits(128), version=4),
+                created_at,
+                updated_at,
+                rng.choice(_pool["titles"]),
+                rng.choice(_pool["descriptions"]),
+                due_date,
+                task_status,
+                priority,
+                rng.choice(_pool["emails"]) if rng.random() < 0.7 else None,
+                list(dict.fromkeys(tags)) or None,
+                owner,
+            )
+        )
+    return records
+
+
+async def _copy_batches(engine, table: str, columns: List[str], batches) -> int:
+    """COPY generated batches as they complete, in one transaction"""
+    copied = 0
+    async with engine.begin() as conn:
+        raw_connection = await conn.get_raw_connection()
+        driver = raw_connection.driver_connection
+        async for records in batches:
+            await driver.copy_records_to_table(table, records=records, columns=columns)
+            copied += len(records)
+    return copied
+
+
+async def _generate(executor, function, jobs: list, workers: int):
+    """Run generator jobs in the pool, keeping a few ahead of the loader"""
+    loop = asyncio.get_running_loop()
+    pending = []
+    jobs = iter(jobs)
+    for args in jobs:
+        pending.append(loop.run_in_executor(executor, function, *args))
+        if len(pending) >= workers * 2:
+            break
+    while pending:
+        records = await pending.pop(0)
+        args = next(jobs, None)
+        if args is not None:
+            pending.append(loop.run_in_executor(executor, function, *args))
+        yield records
+
+
+async def _count(engine, table: str) -> int:
+    """Number of rows already in a table"""
+    async with engine.connect() as conn:
+        return (await conn.execute(text(f"SELECT count(*) FROM {table}"))).scalar()
+
+
+async def seed(
+    database_url: str,
+    users: int = 0,
+    tasks: int = 0,
+    batch_size: int = 10000,
+    workers: Optional[int] = None,
+    seed_value: Optional[int] = None,
+    password: str = "password123",
+    create_tables: bool = False,
+    truncate: bool = False,
+) -> dict:
+    """Generate and COPY users and tasks; generation runs in worker
+    processes while the previous batches are being loaded.
+
+    With no new users, tasks are linked to the users already in the
+    database. Numbering continues after the existing rows, so seeding
+    again without truncating adds rows instead of failing on duplicate
+    emails or ids. Without seed_value a random seed is used. Returns row
+    counts, the seed and elapsed seconds.
+    """
+    workers = workers or os.cpu_count() or 1
+    if seed_value is None:
+        seed_value = random.randrange(2**32)
+    engine = create_async_engine(database_url, echo=False)
+    started = perf_counter()
+    result = {"users": 0, "tasks": 0, "seed": seed_value}
+    try:
+        async with engine.begin() as conn:
+            if create_tables:
+                await conn.run_sync(SQLModel.metadata.create_all)
+            if truncate:
+                await conn.execute(
+                    text(f"TRUNCATE {Task.__tablename__}, {User.__tablename__}")
+                )
+
+        user_ids = []
+        if users:
+            password_hash = generate_password_hash(password)
+            offset = await _count(engine, User.__tablename__)
+            jobs = [
+                (
+                    offset + start,
+                    min(batch_size, users - start),
+                    password_hash,
+                    seed_value,
+                )
+                for start in range(0, users, batch_size)
+            ]
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(seed_value, [])
+            ) as executor:
+
+                async def user_batches():
+                    async for records in _generate(
+                        executor, generate_users, jobs, workers
+                    ):
+                        user_ids.extend(record[0] for record in records)
+                        yield records
+
+                result["users"] = await _copy_batches(
+                    engine, User.__tablename__, USER_COLUMNS, user_batches()
+                )
+        elif tasks:
+            async with engine.connect() as conn:
+                rows = await conn.execute(text(f"SELECT id FROM {User.__tablename__}"))
+                user_ids = [row[0] for row in rows]
+
+        if tasks:
+            offset = await _count(engine, Task.__tablename__)
+            jobs = [
+                (offset + start, min(batch_size, tasks - start), seed_value)
+                for start in range(0, tasks, batch_size)
+            ]
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(seed_value, user_ids)
+            ) as executor:
+                result["tasks"] = await _copy_batches(
+                    engine,
+                    Task.__tablename__,
+                    TASK_COLUMNS,
+                    _generate(executor, generate_tasks, jobs, workers),
+                )
+    finally:
+        await engine.dispose()
+
+    result["seconds"] = round(perf_counter() - started, 2)
+    return result